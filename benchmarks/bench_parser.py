@@ -0,0 +1,109 @@
+"""
+Compares parse_transactions (compact Transaction records, commas stripped
+only when present, low-cardinality strings interned) with the original
+dict-per-row parser, on the same lines: time, rows/s and memory.
+
+Usage: python benchmarks/bench_parser.py [ROWS]   (default 1M)
+ROWS accepts k/M suffixes, e.g. 10k, 1M
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_sales_data import parse_rows
+from utils.file_handler import read_sales_data
+from utils.data_processor import parse_transactions
+
+
+def reference_parse_transactions(raw_lines):
+    """
+    The original dict-per-row parser (comments removed), the benchmark
+    baseline; its dicts compare equal to the records parse_transactions
+    returns
+    """
+    transactions = []
+
+    for line in raw_lines:
+        parts = line.split("|")
+
+        if len(parts) != 8:
+            continue
+
+        try:
+            transaction = {
+                "TransactionID": parts[0],
+                "Date": parts[1],
+                "ProductID": parts[2],
+                "ProductName": parts[3].replace(",", ""),
+                "Quantity": int(parts[4].replace(",", "")),
+                "UnitPrice": float(parts[5].replace(",", "")),
+                "CustomerID": parts[6],
+                "Region": parts[7]
+            }
+            transactions.append(transaction)
+
+        except ValueError:
+            continue
+
+    return transactions
+
+
+def write_sample_file(path, rows, seed=42):
+    rng = random.Random(seed)
+    regions = ["North", "South", "East", "West"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n")
+        for i in range(rows):
+            price = rng.randint(100, 90000)
+            # About 1 in 5 prices carries a thousands separator, like the real data
+            price = f"{price:,}" if i % 5 == 0 else str(price)
+            quantity = "x" if i % 1000 == 0 else str(rng.randint(1, 10))
+            f.write(
+                f"T{i:07d}|2024-12-{rng.randint(1, 30):02d}|P{rng.randint(101, 300)}|"
+                f"Product {rng.randint(1, 200)}|{quantity}|{price}|"
+                f"C{rng.randint(1, 50000):05d}|{rng.choice(regions)}\n"
+            )
+
+
+def measure(parse, lines):
+    start = time.perf_counter()
+    parse(lines)
+    elapsed = time.perf_counter() - start
+
+    # Memory is measured separately, tracemalloc slows parsing down
+    tracemalloc.start()
+    result = parse(lines)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser benchmark")
+    parser.add_argument("rows", nargs="?", type=parse_rows, default=1_000_000,
+                        help="number of data rows, e.g. 10k, 1M (default: 1M)")
+    rows = parser.parse_args().rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales_data.txt")
+        write_sample_file(path, rows)
+        lines = read_sales_data(path)
+
+    new = parse_transactions(lines)
+    old = reference_parse_transactions(lines)
+    assert new == old, "parsers disagree"
+
+    print(f"{'parser':<12}{'seconds':>10}{'rows/s':>14}{'MB':>10}")
+    for name, parse in [("reference", reference_parse_transactions), ("fast-path", parse_transactions)]:
+        elapsed, size, count = measure(parse, lines)
+        print(f"{name:<12}{elapsed:>10.2f}{count / elapsed:>14,.0f}{size / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
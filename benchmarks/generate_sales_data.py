@@ -0,0 +1,150 @@
+"""
+Writes synthetic sales files in the data/sales_data.txt format, with the
+kinds of dirty rows the real export contains.
+
+Usage: python benchmarks/generate_sales_data.py ROWS OUTPUT [--seed N] [--dirty-rate R]
+ROWS accepts k/M suffixes, e.g. 10k, 1M, 100M
+"""
+import argparse
+import random
+
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+REGIONS = ["North", "South", "East", "West"]
+
+# (ProductID, ProductName, price range); names with commas and non-ASCII
+# characters are deliberate, like the real export
+CATALOG = [
+    ("P101", "Laptop", (45000, 90000)),
+    ("P102", "Mouse", (300, 1500)),
+    ("P103", "Keyboard,Mechanical", (1500, 6000)),
+    ("P104", "Monitor", (9000, 30000)),
+    ("P105", "Webcam", (1500, 5000)),
+    ("P106", "Headphones", (800, 6000)),
+    ("P107", "USB Cable", (100, 400)),
+    ("P108", "External Hard Drive,1TB", (3000, 7000)),
+    ("P109", "Wireless Mouse", (500, 2000)),
+    ("P110", "Laptop Charger", (1000, 3500)),
+    ("P111", "Câble HDMI", (200, 900)),
+    ("P112", "Écran Portable", (8000, 20000)),
+    ("P113", "Docking Station,USB-C", (4000, 12000)),
+    ("P114", "Tablet Stand", (400, 2500)),
+    ("P115", "Smart Speaker", (2500, 9000)),
+]
+
+DIRTY_KINDS = [
+    "missing_field", "extra_field", "missing_region", "bad_transaction_id",
+    "bad_product_id", "bad_customer_id", "zero_quantity", "zero_price",
+    "non_numeric", "latin1_bytes"
+]
+
+# Rows are generated and written in batches of this many
+BATCH_SIZE = 50_000
+
+
+def parse_rows(text):
+    """
+    Parses a row count such as 10k, 1M or 2500000
+    """
+    text = text.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def _number(value, rng):
+    # About 1 in 5 numbers carries a thousands separator, like the real data
+    if value >= 1000 and rng.random() < 0.2:
+        return f"{value:,}"
+    return str(value)
+
+
+def _clean_fields(i, rng, customers):
+    product_id, name, (low, high) = CATALOG[rng.randrange(len(CATALOG))]
+    return [
+        f"T{i + 1:09d}",
+        f"2024-12-{rng.randint(1, 31):02d}",
+        product_id,
+        name,
+        _number(rng.randint(1, 10), rng),
+        _number(rng.randint(low, high), rng),
+        f"C{rng.randint(1, customers):06d}",
+        rng.choice(REGIONS)
+    ]
+
+
+def _dirty_line(fields, kind, rng):
+    """
+    Returns: bytes of one malformed or invalid row
+    """
+    if kind == "missing_field":
+        del fields[rng.randrange(len(fields))]
+    elif kind == "extra_field":
+        fields.insert(rng.randrange(len(fields)), "N/A")
+    elif kind == "missing_region":
+        fields[7] = ""
+    elif kind == "bad_transaction_id":
+        fields[0] = "X" + fields[0][1:]
+    elif kind == "bad_product_id":
+        fields[2] = "Q" + fields[2][1:]
+    elif kind == "bad_customer_id":
+        fields[6] = "D" + fields[6][1:]
+    elif kind == "zero_quantity":
+        fields[4] = rng.choice(["0", "-1"])
+    elif kind == "zero_price":
+        fields[5] = "0"
+    elif kind == "non_numeric":
+        fields[rng.choice([4, 5])] = "abc"
+    elif kind == "latin1_bytes":
+        # A valid row written from a latin-1 system: not decodable as UTF-8
+        fields[3] = "Câble Réseau"
+        return ("|".join(fields) + "\n").encode("latin-1")
+    return ("|".join(fields) + "\n").encode("utf-8")
+
+
+def write_sales_file(path, rows, seed=42, dirty_rate=0.02):
+    """
+    Writes `rows` data rows (plus header) to `path`. Roughly `dirty_rate`
+    of them are malformed or invalid, spread evenly over DIRTY_KINDS.
+
+    Returns: dict of dirty row counts by kind
+    """
+    rng = random.Random(seed)
+    customers = max(50, rows // 20)
+    dirty = dict.fromkeys(DIRTY_KINDS, 0)
+
+    with open(path, "wb") as f:
+        f.write((HEADER + "\n").encode("utf-8"))
+        for batch_start in range(0, rows, BATCH_SIZE):
+            lines = []
+            for i in range(batch_start, min(rows, batch_start + BATCH_SIZE)):
+                fields = _clean_fields(i, rng, customers)
+                if rng.random() < dirty_rate:
+                    kind = rng.choice(DIRTY_KINDS)
+                    dirty[kind] += 1
+                    lines.append(_dirty_line(fields, kind, rng))
+                else:
+                    lines.append(("|".join(fields) + "\n").encode("utf-8"))
+            f.write(b"".join(lines))
+
+    return dirty
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales data file")
+    parser.add_argument("rows", type=parse_rows, help="number of data rows, e.g. 10k, 1M")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dirty-rate", type=float, default=0.02,
+                        help="fraction of malformed or invalid rows (default: 0.02)")
+    args = parser.parse_args()
+
+    dirty = write_sales_file(args.output, args.rows, args.seed, args.dirty_rate)
+    print(f"Wrote {args.rows:,} rows to {args.output} ({sum(dirty.values()):,} dirty)")
+    for kind, count in dirty.items():
+        print(f"  {kind}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
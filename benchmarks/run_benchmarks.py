@@ -0,0 +1,210 @@
+"""
+Times and memory-profiles every pipeline stage on synthetic sales files and
+compares the results with stored baselines.
+
+Usage: python benchmarks/run_benchmarks.py [--rows 10k,1M] [--save-baseline]
+       [--tolerance 0.25] [--no-memory]
+
+Generated files are kept in benchmarks/.data and reused. Baselines live in
+benchmarks/baselines.json, keyed by row count; a stage regresses when it is
+slower than its baseline by more than the tolerance (and NOISE_FLOOR seconds).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_sales_data import write_sales_file, parse_rows, CATALOG
+from utils.file_handler import read_sales_data
+from utils.data_processor import (
+    parse_transactions,
+    validate_and_filter,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+    analyze_sales
+)
+from utils.api_handler import create_product_mapping, enrich_sales_data, save_enriched_data
+from utils.report_generator import generate_sales_report
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines.json")
+NOISE_FLOOR = 0.05
+
+
+def sample_product_map():
+    """
+    Offline stand-in for the product API: every catalog product but the
+    last two has a record
+    """
+    products = []
+    for product_id, name, _ in CATALOG[:-2]:
+        products.append({
+            "id": int(product_id[1:]),
+            "title": name,
+            "category": "electronics",
+            "brand": "Generic",
+            "rating": 4.2
+        })
+    return create_product_mapping(products)
+
+
+def data_file(rows, seed=42):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"sales_{rows}_{seed}.txt")
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} rows -> {path}")
+        write_sales_file(path + ".tmp", rows, seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def pipeline_stages(path, out_dir):
+    """
+    Returns: list of (stage name, function taking the previous results dict
+    and returning this stage's result), in pipeline order
+    """
+    return [
+        ("read_sales_data", lambda r: read_sales_data(path)),
+        ("parse_transactions", lambda r: parse_transactions(r["read_sales_data"])),
+        ("validate_and_filter", lambda r: validate_and_filter(r["parse_transactions"])[0]),
+        ("calculate_total_revenue", lambda r: calculate_total_revenue(r["validate_and_filter"])),
+        ("region_wise_sales", lambda r: region_wise_sales(r["validate_and_filter"])),
+        ("top_selling_products", lambda r: top_selling_products(r["validate_and_filter"])),
+        ("customer_analysis", lambda r: customer_analysis(r["validate_and_filter"])),
+        ("daily_sales_trend", lambda r: daily_sales_trend(r["validate_and_filter"])),
+        ("find_peak_sales_day", lambda r: find_peak_sales_day(r["validate_and_filter"])),
+        ("low_performing_products", lambda r: low_performing_products(r["validate_and_filter"])),
+        ("analyze_sales", lambda r: analyze_sales(r["validate_and_filter"])),
+        ("enrich_sales_data", lambda r: enrich_sales_data(
+            r["validate_and_filter"], sample_product_map()
+        )),
+        ("save_enriched_data", lambda r: save_enriched_data(
+            r["enrich_sales_data"], os.path.join(out_dir, "enriched.txt")
+        )),
+        ("generate_sales_report", lambda r: generate_sales_report(
+            r["validate_and_filter"], r["enrich_sales_data"],
+            os.path.join(out_dir, "report.txt"), analysis=r["analyze_sales"]
+        )),
+    ]
+
+
+def run_stages(path, measure_memory=True):
+    """
+    Runs the pipeline once for timings, then (optionally) once more under
+    tracemalloc, since tracing slows every allocation down
+
+    Returns: dict stage -> {"seconds", "peak_mb"}
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        results = {}
+        for name, stage in pipeline_stages(path, out_dir):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                results[name] = stage(results)
+                elapsed = time.perf_counter() - start
+            timings[name] = {"seconds": round(elapsed, 4), "peak_mb": None}
+
+        if measure_memory:
+            results = {}
+            for name, stage in pipeline_stages(path, out_dir):
+                tracemalloc.start()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = stage(results)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                timings[name]["peak_mb"] = round(peak / 1e6, 2)
+
+    return timings
+
+
+def load_baselines(baseline_file=BASELINE_FILE):
+    try:
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_baselines(baselines, baseline_file=BASELINE_FILE):
+    with open(baseline_file, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(timings, baseline, tolerance):
+    """
+    Prints one line per stage against its baseline
+
+    Returns: list of regressed stage names
+    """
+    regressions = []
+    print(f"{'stage':<26}{'seconds':>10}{'baseline':>10}{'change':>9}{'peak MB':>10}")
+    for name, current in timings.items():
+        seconds = current["seconds"]
+        peak = "-" if current["peak_mb"] is None else f"{current['peak_mb']:.1f}"
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<26}{seconds:>10.3f}{'-':>10}{'':>9}{peak:>10}")
+            continue
+
+        change = (seconds / reference["seconds"] - 1) if reference["seconds"] else 0.0
+        flag = ""
+        if change > tolerance and seconds - reference["seconds"] > NOISE_FLOOR:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<26}{seconds:>10.3f}{reference['seconds']:>10.3f}"
+            f"{change:>+9.0%}{peak:>10}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales pipeline benchmarks")
+    parser.add_argument("--rows", default="10k",
+                        help="comma-separated sizes, e.g. 10k,1M,10M,100M (default: 10k)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a stage is a regression (default: 0.25)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc pass (much faster on large files)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    regressions = []
+
+    for rows in map(parse_rows, args.rows.split(",")):
+        path = data_file(rows, args.seed)
+        print(f"\n{rows:,} rows")
+        timings = run_stages(path, measure_memory=not args.no_memory)
+        regressions += compare(timings, baselines.get(str(rows), {}), args.tolerance)
+        if args.save_baseline:
+            baselines[str(rows)] = timings
+
+    if args.save_baseline:
+        save_baselines(baselines)
+        print(f"\nBaselines saved to {BASELINE_FILE}")
+    elif regressions:
+        print(f"\n{len(regressions)} stage(s) regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
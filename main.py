@@ -1,103 +1,686 @@
-from utils.file_handler import read_sales_data
+import argparse
+import os
+
+from utils.file_handler import iter_sales_data, expand_partitions, is_compressed
 from utils.data_processor import (
-    parse_transactions,
-    validate_and_filter,
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
+    iter_transactions,
+    validate_into_table,
+    SalesAggregator
 )
+from utils.query_index import scan_filter
 from utils.api_handler import (
-    fetch_all_products,
-    create_product_mapping,
+    sold_product_ids,
+    fetch_products,
+    fetch_products_by_ids,
+    print_fetch_status,
     enrich_sales_data,
-    save_enriched_data
+    merge_enrichment_summaries,
+    output_format,
+    save_enriched_data,
+    ENRICHED_FILE
+)
+from utils.report_generator import (
+    save_snapshot,
+    load_snapshot,
+    render_reports,
+    SNAPSHOT_FILE,
+    EXPORT_DIR,
+    EXPORT_FORMATS
+)
+from utils.parallel import process_in_parallel, process_partitions
+from utils import profiler
+from utils.batch import (
+    BATCH_DIR, check_query_names, load_queries, parse_query_spec, report_paths, run_queries
+)
+from utils.parse_cache import CACHE_FILE, load_parsed, save_parsed
+from utils.scheduler import StageGraph
+from utils.service import METRICS, SalesService, make_server
+from utils.incremental import (
+    new_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+    resume_output,
+    record_output,
+    fold_new_rows
 )
-from utils.report_generator import generate_sales_report
+
+
+DATA_FILE = "data/sales_data.txt"
+
+
+def export_formats(text):
+    formats = [name.strip().lower() for name in text.split(",") if name.strip()]
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown export format: {', '.join(sorted(unknown))}")
+    return formats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument(
+        "--input", default=DATA_FILE, metavar="SOURCE",
+        help="sales file (.gz/.bz2/.xz/.zst are decompressed), directory or glob "
+             f"of partition files (default: {DATA_FILE})"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="parse, validate and aggregate with N processes (default: 1)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="fold only rows appended since the last incremental run (no filters)"
+    )
+    parser.add_argument(
+        "--customer-capacity", type=int, default=None,
+        help="track customers approximately with at most N keys (bounded memory)"
+    )
+    parser.add_argument(
+        "--distinct-limit", type=int, default=None,
+        help="count unique customers/products exactly up to N, then with HyperLogLog"
+    )
+    parser.add_argument(
+        "--memory-budget", type=float, default=None, metavar="MB",
+        help="keep about MB of exact customer totals in memory, spilling the rest to disk"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help=f"always parse the text file instead of mapping {CACHE_FILE}"
+    )
+    parser.add_argument(
+        "--queries", metavar="FILE",
+        help="batch mode: JSON list of filter specs, one report per spec, no prompts"
+    )
+    parser.add_argument(
+        "--query", action="append", default=[], metavar="SPEC",
+        help='batch mode filter spec such as "name=north,region=North,min=500" (repeatable)'
+    )
+    parser.add_argument(
+        "--enriched-output", default=ENRICHED_FILE, metavar="FILE",
+        help="enriched data file; .gz/.zst are compressed, .bin is columnar "
+             f"(default: {ENRICHED_FILE})"
+    )
+    parser.add_argument(
+        "--export", type=export_formats, default=[], metavar="FORMATS",
+        help=f"also export the analysis to {EXPORT_DIR} as csv and/or json, e.g. csv,json"
+    )
+    parser.add_argument(
+        "--render-only", action="store_true",
+        help=f"only re-render the reports from {SNAPSHOT_FILE}, without reading any data"
+    )
+    parser.add_argument(
+        "--serve", metavar="ADDRESS",
+        help="keep the data loaded and answer analytics over HTTP on PORT, "
+             "HOST:PORT or a Unix socket path"
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE",
+        help="write per-stage timing, rows and memory as a JSON run profile"
+    )
+    parser.add_argument(
+        "--cprofile", metavar="DIR",
+        help="also dump a cProfile file per stage into DIR (implies --profile)"
+    )
+    return parser.parse_args()
+
+
+def aggregator_options(args):
+    """
+    Returns: SalesAggregator keyword arguments selected on the command line
+    """
+    return {
+        "customer_capacity": args.customer_capacity,
+        "distinct_limit": args.distinct_limit,
+        "memory_budget": args.memory_budget
+    }
+
+
+def prompt_filters():
+    """
+    Asks for the optional region and amount filters
+    Returns: (region, min_amount, max_amount)
+    """
+    profiler.begin("filters")
+    print("\n[3/10] Filter Options Available:")
+    print("Regions: North, South, East, West")
+    print("Amount Range: ₹500 - ₹900,000")
+
+    choice = input("Do you want to filter data? (y/n): ").lower()
+
+    if choice == "y":
+        region = input("Enter region (or press Enter to skip): ") or None
+        min_amt = input("Min amount (or press Enter): ")
+        max_amt = input("Max amount (or press Enter): ")
+        min_amt = float(min_amt) if min_amt else None
+        max_amt = float(max_amt) if max_amt else None
+    else:
+        region = min_amt = max_amt = None
+
+    return region, min_amt, max_amt
+
+
+def print_rejections(summary):
+    """
+    Prints the non-zero per-rule rejection counts from validate_and_filter
+    """
+    counts = summary.get("rejected_by_rule", {})
+    rejected = [f"{name}={count}" for name, count in counts.items() if count]
+    if rejected:
+        print("  Rejected by rule:", ", ".join(rejected))
+
+
+def print_malformed(count):
+    """
+    Prints how many rows the parser rejected, when there were any
+    """
+    if count:
+        print(f"⚠ Skipped {count} malformed rows")
+
+
+def read_and_parse(source=DATA_FILE, use_cache=True):
+    """
+    Steps 1-2: reads, parses and validates the sales file in one streamed
+    pass (rows go straight from the parser into the table's columns), or
+    maps the parsed-data cache when the file is unchanged
+
+    Returns: (valid TransactionTable, stats with the validation results)
+    """
+    cached = load_parsed(source) if use_cache else None
+
+    if cached is None:
+        # 1. Read data
+        print("\n[1/10] Reading sales data...")
+        profiler.begin("read")
+        read_stats = {}
+        raw = iter_sales_data(source, stats=read_stats)
+
+        # 2. Parse (lines are streamed through the parser and validator)
+        print("\n[2/10] Parsing and cleaning data...")
+        profiler.begin("parse")
+        rejects = []
+        table, invalid, summary, _, _ = validate_into_table(iter_transactions(raw, rejects))
+        print(f"✓ Successfully read {read_stats.get('lines', 0)} records")
+        print(f"✓ Parsed {summary['total_input']} transactions")
+        profiler.set_rows(read_stats.get("lines", 0), summary["total_input"])
+        if rejects:
+            print(f"⚠ Skipped {len(rejects)} malformed rows, e.g.:")
+            for number, reason, _ in rejects[:5]:
+                print(f"  record {number}: {reason}")
+
+        stats = {
+            "lines": read_stats.get("lines", 0),
+            "parsed": summary["total_input"],
+            "malformed": len(rejects),
+            "invalid": invalid,
+            "summary": summary
+        }
+        try:
+            save_parsed(source, table, stats)
+        except OSError as e:
+            print(f"⚠ Could not write {CACHE_FILE}: {e}")
+        return table, stats
+
+    # 1-2. Source unchanged: map the parsed columns instead
+    print("\n[1/10] Reading sales data...")
+    profiler.begin("read")
+    table, stats = cached
+    print(f"✓ Source unchanged, mapped {CACHE_FILE}")
+    print(f"✓ Successfully read {stats['lines']} records")
+    profiler.set_rows(rows_out=stats["lines"])
+
+    print("\n[2/10] Parsing skipped (using cached transactions)")
+    profiler.begin("parse")
+    print(f"✓ Parsed {stats['parsed']} transactions")
+    profiler.set_rows(stats["lines"], stats["parsed"])
+    print_malformed(stats["malformed"])
+    return table, stats
+
+
+def validate_parsed(parsed):
+    """
+    Step 4: reports the validation results read_and_parse produced
+
+    Returns: (valid TransactionTable, invalid count, summary)
+    """
+    print("\n[4/10] Validating transactions...")
+    profiler.begin("validate")
+    valid_tx, stats = parsed
+    # Same console output as validate_and_filter
+    print("Available Regions:", set(valid_tx.encoded["Region"].distinct()))
+    if len(valid_tx):
+        print("Transaction Amount Range:", min(valid_tx.revenue), "-", max(valid_tx.revenue))
+
+    return valid_tx, stats["invalid"], stats["summary"]
+
+
+def render_snapshot(exports=()):
+    """
+    Re-renders the reports (and exports) from the last aggregate snapshot
+    """
+    print(f"\nRendering reports from {SNAPSHOT_FILE}...")
+    profiler.begin("report")
+    aggregator, enrichment = load_snapshot()
+    render_reports(aggregator, enrichment, exports=exports)
+    print("✓ Report saved to output/sales_report.txt")
+
+
+def run_batch(queries, source=DATA_FILE, options=None, use_cache=True,
+              enriched_output=ENRICHED_FILE):
+    """
+    Parses and validates once, then aggregates every filter query in a
+    single pass and writes one report per query to BATCH_DIR
+    """
+    parsed = read_and_parse(source, use_cache)
+
+    print(f"\n[3/10] Batch mode: {len(queries)} queries")
+    for query in queries:
+        print(
+            f"  {query['name']}: region={query['region'] or 'all'}, "
+            f"min={query['min_amount']}, max={query['max_amount']}"
+        )
+
+    valid_tx, invalid, summary = validate_parsed(parsed)
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid}")
+    profiler.set_rows(summary["total_input"], len(valid_tx))
+    print_rejections(summary)
+
+    print("\n[5/10] Fetching product data from API...")
+    profiler.begin("fetch_products")
+    product_ids = sold_product_ids(valid_tx)
+    product_map = fetch_products_by_ids(product_ids)
+    print(f"✓ Fetched {len(product_map)}/{len(product_ids)} products")
+
+    print("\n[6/10] Enriching sales data...")
+    profiler.begin("enrich")
+    enriched = enrich_sales_data(valid_tx, product_map)
+    print(f"✓ Enriched {enriched.matched}/{len(enriched)} transactions")
+
+    print("\n[7/10] Analyzing all queries in one pass...")
+    profiler.begin("analyze", rows_in=len(valid_tx))
+    results = run_queries(valid_tx, queries, options, enriched)
+    print(f"✓ Analysis complete for {len(results)} queries")
+
+    print("\n[8/10] Saving enriched data...")
+    profiler.begin("save_enriched")
+    save_enriched_data(enriched, enriched_output)
+    print(f"✓ Saved to {enriched_output}")
+
+    print("\n[9/10] Generating reports...")
+    profiler.begin("report")
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    for query, aggregator, enrichment in results:
+        report_file, summary_file, snapshot_file = report_paths(query)
+        save_snapshot(aggregator, enrichment, snapshot_file)
+        render_reports(aggregator, enrichment, report_file, summary_file)
+    print(f"✓ {len(results)} reports saved to {BATCH_DIR}")
+
+    print("\n[10/10] Process Complete!")
+    print("=" * 40)
+
+
+def print_partitions(partitions):
+    """
+    Prints read/valid/invalid/malformed counts and rejection reasons per
+    partition file
+    """
+    for partition in partitions:
+        malformed = f", {partition['malformed']} malformed" if partition["malformed"] else ""
+        print(
+            f"  {partition['file']}: {partition['lines']} records, "
+            f"{partition['valid']} valid, {partition['invalid']} invalid{malformed}"
+        )
+        counts = partition["summary"].get("rejected_by_rule", {})
+        rejected = [f"{name}={count}" for name, count in counts.items() if count]
+        if rejected:
+            print("    Rejected by rule:", ", ".join(rejected))
+
+
+def run_incremental(source=DATA_FILE, options=None, enriched_output=ENRICHED_FILE, exports=()):
+    """
+    Folds only the rows appended since the last incremental run into the
+    checkpointed aggregates, then regenerates the reports from them
+    """
+    print("\n[1/10] Loading checkpoint...")
+    profiler.begin("read")
+    checkpoint = load_checkpoint(source)
+    if checkpoint is not None and not resume_output(checkpoint, enriched_output):
+        print(f"{enriched_output} does not match the checkpoint")
+        checkpoint = None
+    if checkpoint is None:
+        print("No usable checkpoint, processing the whole file")
+        checkpoint = new_checkpoint(source, options)
+        append = False
+    else:
+        print(f"✓ Resuming at byte {checkpoint['offset']}")
+        append = True
+
+    print("\n[2/10] Reading and parsing new rows...")
+    profiler.begin("parse")
+    lines_before = checkpoint["lines"]
+    malformed_before = checkpoint["malformed"]
+    invalid_before = checkpoint["invalid"]
+    new_tx = fold_new_rows(source, checkpoint)
+    print(f"✓ Read {checkpoint['lines'] - lines_before} new records")
+    print_malformed(checkpoint["malformed"] - malformed_before)
+    new_lines = checkpoint["lines"] - lines_before
+    profiler.set_rows(new_lines, new_lines - (checkpoint["malformed"] - malformed_before))
+
+    print("\n[3/10] Filters are not available in incremental mode")
+
+    print("\n[4/10] Validating transactions...")
+    print(f"✓ Valid: {len(new_tx)} | Invalid: {checkpoint['invalid'] - invalid_before}")
+
+    print("\n[5/10] Updating aggregates...")
+    profiler.begin("analyze")
+    aggregator = checkpoint["aggregator"]
+    print(f"✓ Aggregates cover {aggregator.transaction_count} transactions")
+
+    print("\n[6/10] Fetching product data from API...")
+    profiler.begin("fetch_products")
+    product_ids = sold_product_ids(new_tx)
+    product_map = fetch_products_by_ids(product_ids)
+    print(f"✓ Fetched {len(product_map)}/{len(product_ids)} products")
+
+    print("\n[7/10] Enriching new sales data...")
+    profiler.begin("enrich")
+    enriched = enrich_sales_data(new_tx, product_map)
+    new_enrichment = enriched.summary()
+    enrichment = merge_enrichment_summaries(checkpoint["enrichment"], new_enrichment)
+    print(f"✓ Enriched {new_enrichment['matched']}/{new_enrichment['total']} transactions")
+
+    print("\n[8/10] Saving enriched data...")
+    profiler.begin("save_enriched")
+    save_enriched_data(enriched, enriched_output, append=append)
+    # The next run cuts off anything written after this point
+    record_output(checkpoint, enriched_output)
+    save_checkpoint(checkpoint)
+    print(f"✓ Saved to {enriched_output}")
+
+    print("\n[9/10] Generating report...")
+    profiler.begin("report")
+    save_snapshot(aggregator, enrichment)
+    render_reports(aggregator, enrichment, exports=exports)
+    print("✓ Report saved to output/sales_report.txt")
+
+    print("\n[10/10] Process Complete!")
+    print("=" * 40)
+
+
+def run_service(source, address, options=None, use_cache=True):
+    """
+    Loads and validates the sales file once, then serves filtered
+    analytics from memory until interrupted
+    """
+    print(f"\nLoading {source}...")
+    profiler.begin("load")
+    service = SalesService(source, options, use_cache).load()
+    print(f"✓ {len(service.index.table)} valid transactions in memory")
+
+    server = make_server(service, address)
+    print(f"Serving analytics on {address} (Ctrl+C to stop)")
+    print("Paths: /analysis, /health, /" + ", /".join(METRICS))
+    profiler.begin("serve")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping service")
+    finally:
+        server.server_close()
+
+
+def load_in_parallel(args, partitions, by_partition):
+    """
+    Steps 1-5 on worker processes: read, parse, validate, filter and aggregate
+    Returns: (valid TransactionTable, SalesAggregator)
+    """
+    if by_partition:
+        print(f"\n[1/10] Reading {len(partitions)} partition(s) with {args.workers} workers...")
+    else:
+        print(f"\n[1/10] Reading sales data with {args.workers} workers...")
+    print("\n[2/10] Parsing is done inside the workers")
+    region, min_amt, max_amt = prompt_filters()
+
+    print("\n[4/10] Validating transactions...")
+    profiler.begin("read_parse_validate")
+    if by_partition:
+        result = process_partitions(
+            partitions, region, min_amt, max_amt, workers=args.workers,
+            aggregator_options=aggregator_options(args)
+        )
+    else:
+        # Not by partition: a single file, already resolved
+        result = process_in_parallel(
+            partitions[0], region, min_amt, max_amt, workers=args.workers,
+            aggregator_options=aggregator_options(args)
+        )
+    valid_tx, invalid = result["table"], result["invalid"]
+    print(f"✓ Successfully read {result['lines']} records")
+    print_malformed(result["malformed"])
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid}")
+    profiler.set_rows(result["lines"], len(valid_tx))
+    print_rejections(result["summary"])
+    print_partitions(result["partitions"])
+
+    print("\n[5/10] Analyzing sales data...")
+    print("✓ Analysis complete")
+    return valid_tx, result["aggregator"]
+
+
+def validate_and_select(parsed):
+    """
+    Steps 3-4: asks for filters, reports validation and applies the filters
+    Returns: valid (filtered) TransactionTable
+    """
+    # 3. Filter options
+    region, min_amt, max_amt = prompt_filters()
+
+    # 4. Validate
+    valid_tx, invalid, summary = validate_parsed(parsed)
+    if region or min_amt is not None or max_amt is not None:
+        # One query: a linear scan beats building the indexes (those are
+        # for the service, which queries them repeatedly)
+        valid_tx, amount_range = scan_filter(valid_tx, summary, region, min_amt, max_amt)
+        if amount_range:
+            low, high = amount_range
+            print(f"Amount Range in {region or 'all regions'}:", low, "-", high)
+    print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid}")
+    profiler.set_rows(summary["total_input"], len(valid_tx))
+    print_rejections(summary)
+
+    return valid_tx
+
+
+def analyze(valid_tx, options):
+    """
+    Step 5
+    Returns: SalesAggregator
+    """
+    print("\n[5/10] Analyzing sales data...")
+    profiler.begin("analyze", rows_in=len(valid_tx))
+    aggregator = SalesAggregator(**options).update(valid_tx)
+    print("✓ Analysis complete")
+    return aggregator
+
+
+def fetch_catalog(parsed):
+    """
+    Background stage: fetches product data for every valid row, a
+    superset of what a filtered report needs, without waiting for the
+    filters
+    Returns: (product ID mapping, whether the network was unavailable)
+    """
+    valid_tx, _ = parsed
+    return fetch_products(sold_product_ids(valid_tx))
+
+
+def select_products(catalog, valid_tx):
+    """
+    Step 6: keeps the fetched products that the valid rows actually sold
+    Returns: product ID mapping
+    """
+    print("\n[6/10] Fetching product data from API...")
+    profiler.begin("fetch_products")
+    product_map, network_down = catalog
+    product_ids = sold_product_ids(valid_tx)
+    if product_ids:
+        print_fetch_status(network_down)
+    product_map = {pid: product_map[pid] for pid in sorted(product_ids) if pid in product_map}
+    print(f"✓ Fetched {len(product_map)}/{len(product_ids)} products")
+    return product_map
+
+
+def enrich(valid_tx, product_map):
+    """
+    Step 7
+    Returns: EnrichedSales
+    """
+    print("\n[7/10] Enriching sales data...")
+    profiler.begin("enrich")
+    enriched = enrich_sales_data(valid_tx, product_map)
+    profiler.set_rows(len(valid_tx), enriched.matched)
+    print(f"✓ Enriched {enriched.matched}/{len(enriched)} transactions")
+    return enriched
+
+
+def save_enriched(enriched, filename):
+    """
+    Step 8
+    """
+    print("\n[8/10] Saving enriched data...")
+    profiler.begin("save_enriched")
+    save_enriched_data(enriched, filename)
+    print(f"✓ Saved to {filename}")
+
+
+def report(aggregator, enriched, exports=()):
+    """
+    Step 9: snapshot, report, summary and exports
+    """
+    print("\n[9/10] Generating report...")
+    profiler.begin("report")
+    enrichment = enriched.summary()
+    save_snapshot(aggregator, enrichment)
+    render_reports(aggregator, enrichment, exports=exports)
+    print("✓ Report saved to output/sales_report.txt")
+
+
+def serial_pipeline(args, source, use_cache=True):
+    """
+    The single-process run over `source` (one resolved file) as a stage
+    graph: the catalog fetch starts as soon as the rows are parsed and
+    validated, and its network wait overlaps the filter prompt and
+    aggregation.
+    CPU-bound stages stay on the main thread: on threads they would only
+    contend for the GIL.
+    """
+    options = aggregator_options(args)
+    graph = StageGraph()
+    graph.add("parse", lambda: read_and_parse(source, use_cache))
+    graph.add("catalog", fetch_catalog, ["parse"], background=True)
+    graph.add("validate", validate_and_select, ["parse"])
+    graph.add("analyze", lambda valid_tx: analyze(valid_tx, options), ["validate"])
+    graph.add("products", select_products, ["catalog", "validate"])
+    graph.add("enrich", enrich, ["validate", "products"])
+    graph.add("save_enriched", lambda enriched: save_enriched(enriched, args.enriched_output), ["enrich"])
+    graph.add("report", lambda aggregator, enriched: report(aggregator, enriched, args.export),
+              ["analyze", "enrich"])
+    return graph
+
+
+def parallel_pipeline(args, partitions, by_partition):
+    """
+    The multi-process run as a stage graph. Workers parse, validate and
+    aggregate together, so the catalog fetch can only start once they are
+    done (their product IDs are not known earlier).
+    """
+    graph = StageGraph()
+    graph.add("load", lambda: load_in_parallel(args, partitions, by_partition))
+    graph.add("catalog", lambda loaded: fetch_products(sold_product_ids(loaded[0])), ["load"], background=True)
+    graph.add("products", lambda catalog, loaded: select_products(catalog, loaded[0]), ["catalog", "load"])
+    graph.add("enrich", lambda loaded, product_map: enrich(loaded[0], product_map), ["load", "products"])
+    graph.add("save_enriched", lambda enriched: save_enriched(enriched, args.enriched_output), ["enrich"])
+    graph.add("report", lambda loaded, enriched: report(loaded[1], enriched, args.export), ["load", "enrich"])
+    return graph
 
 
 def main():
+    args = parse_args()
+    if args.profile or args.cprofile:
+        profiler.enable(cprofile_dir=args.cprofile)
+
     try:
         print("=" * 40)
         print("SALES ANALYTICS SYSTEM")
         print("=" * 40)
 
-        # 1. Read data
-        print("\n[1/10] Reading sales data...")
-        raw = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw)} records")
+        if args.render_only:
+            render_snapshot(args.export)
+            return
 
-        # 2. Parse
-        print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw)
-        print(f"✓ Parsed {len(transactions)} transactions")
-
-        # 3. Filter options
-        print("\n[3/10] Filter Options Available:")
-        print("Regions: North, South, East, West")
-        print("Amount Range: ₹500 - ₹900,000")
-
-        choice = input("Do you want to filter data? (y/n): ").lower()
-
-        if choice == "y":
-            region = input("Enter region (or press Enter to skip): ") or None
-            min_amt = input("Min amount (or press Enter): ")
-            max_amt = input("Max amount (or press Enter): ")
-            min_amt = float(min_amt) if min_amt else None
-            max_amt = float(max_amt) if max_amt else None
-        else:
-            region = min_amt = max_amt = None
+        partitions = expand_partitions(args.input)
+        if not partitions:
+            raise FileNotFoundError(f"No files match '{args.input}'")
+        single_file = len(partitions) == 1
+        # A glob or directory matching one file is read as that file
+        source = partitions[0] if single_file else args.input
+        # The parsed-data cache is keyed by one file's size/mtime/content
+        use_cache = single_file and not args.no_cache
 
-        # 4. Validate
-        print("\n[4/10] Validating transactions...")
-        valid_tx, invalid, summary = validate_and_filter(
-            transactions, region, min_amt, max_amt
-        )
-        print(f"✓ Valid: {len(valid_tx)} | Invalid: {invalid}")
-
-        # 5. Analysis
-        print("\n[5/10] Analyzing sales data...")
-        total_revenue = calculate_total_revenue(valid_tx)
-        regions = region_wise_sales(valid_tx)
-        top_products = top_selling_products(valid_tx)
-        customers = customer_analysis(valid_tx)
-        trend = daily_sales_trend(valid_tx)
-        peak_day = find_peak_sales_day(valid_tx)
-        low_products = low_performing_products(valid_tx)
-        print("✓ Analysis complete")
-
-        # 6. API
-        print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_map = create_product_mapping(api_products)
-        print(f"✓ Fetched {len(api_products)} products")
-
-        # 7. Enrichment
-        print("\n[7/10] Enriching sales data...")
-        enriched = enrich_sales_data(valid_tx, product_map)
-        success = sum(1 for t in enriched if t["API_Match"])
-        print(f"✓ Enriched {success}/{len(enriched)} transactions")
-
-        # 8. Save enriched
-        print("\n[8/10] Saving enriched data...")
-        save_enriched_data(enriched)
-        print("✓ Saved to output/enriched_sales_data.txt")
-
-        # 9. Report
-        print("\n[9/10] Generating report...")
-        generate_sales_report(valid_tx, enriched)
-        print("✓ Report saved to output/sales_report.txt")
+        if args.serve:
+            if not single_file:
+                raise ValueError("Service mode needs a single sales file")
+            run_service(source, args.serve, aggregator_options(args), use_cache)
+            return
+
+        if args.incremental:
+            if not single_file or is_compressed(partitions[0]):
+                raise ValueError("Incremental mode needs a single uncompressed file")
+            if args.memory_budget:
+                raise ValueError("Incremental checkpoints keep every customer: --memory-budget is not supported")
+            if output_format(args.enriched_output) == "columnar":
+                raise ValueError("Incremental runs append to the enriched output: use a text, .gz or .zst file, not .bin")
+            run_incremental(
+                source, aggregator_options(args), args.enriched_output, args.export
+            )
+            return
+
+        if args.queries or args.query:
+            queries = load_queries(args.queries) if args.queries else []
+            queries += [
+                parse_query_spec(spec, len(queries) + number)
+                for number, spec in enumerate(args.query, 1)
+            ]
+            check_query_names(queries)
+            run_batch(
+                queries, source, aggregator_options(args), use_cache=use_cache,
+                enriched_output=args.enriched_output
+            )
+            return
+
+        # Partitions (and compressed files, which cannot be split into byte
+        # ranges) are decoded one file per worker
+        by_partition = not single_file or (args.workers > 1 and is_compressed(partitions[0]))
+        if args.workers > 1 or by_partition:
+            graph = parallel_pipeline(args, partitions, by_partition)
+        else:
+            graph = serial_pipeline(args, source, use_cache)
+        graph.run()
 
         # 10. Done
         print("\n[10/10] Process Complete!")
         print("=" * 40)
 
     except Exception as e:
+        profiler.fail(e)
         print("\n❌ ERROR:", str(e))
 
+    finally:
+        profile = profiler.disable()
+        if profile is not None:
+            profile_file = args.profile or "output/run_profile.json"
+            profile.write(profile_file)
+            print(f"Run profile saved to {profile_file}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from utils import spill
+from utils.data_processor import SalesAggregator, parse_transactions
+
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def random_transactions(rows, seed):
+    # Whole-number and half prices keep every sum exact in any order
+    rng = random.Random(seed)
+    return parse_transactions([
+        f"T{i:05d}|2024-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}|P10{rng.randint(1, 9)}|"
+        f"Item{rng.randint(1, 9)}|{rng.randint(1, 20)}|{rng.choice([100.0, 250.0, 999.5])}|"
+        f"C{rng.randint(1, 80):03d}|{rng.choice(REGIONS)}"
+        for i in range(rows)
+    ])
+
+
+def comparable(result):
+    """
+    Products bought are sets; compare them sorted
+    """
+    for info in result["customers"].values():
+        info["products_bought"] = sorted(info["products_bought"])
+    return result
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(spill, "SPILL_DIR", str(tmp_path / "customer_spill"))
+
+
+@pytest.mark.parametrize("options", [{}, {"distinct_limit": 1000}, {"memory_budget": 0.002}])
+@pytest.mark.parametrize("parts", [2, 5])
+def test_merged_chunks_match_a_single_pass(options, parts):
+    transactions = random_transactions(3000, seed=11)
+    single = SalesAggregator(**options).update(transactions)
+
+    size = -(-len(transactions) // parts)
+    merged = SalesAggregator(**options)
+    for start in range(0, len(transactions), size):
+        merged.merge(SalesAggregator(**options).update(transactions[start:start + size]))
+
+    for top_customers in (None, 5):
+        assert comparable(merged.result(top_customers=top_customers)) == comparable(
+            single.result(top_customers=top_customers)
+        )
+    merged.close()
+    single.close()
+
+
+def test_single_pass_matches_brute_force_totals():
+    transactions = random_transactions(2000, seed=4)
+    result = SalesAggregator().update(transactions).result(n=100)
+
+    assert result["total_revenue"] == sum(tx.Quantity * tx.UnitPrice for tx in transactions)
+    for region in REGIONS:
+        rows = [tx for tx in transactions if tx.Region == region]
+        assert result["region_sales"][region]["total_sales"] == sum(tx.Quantity * tx.UnitPrice for tx in rows)
+        assert result["region_sales"][region]["transaction_count"] == len(rows)
+
+    for customer, info in result["customers"].items():
+        rows = [tx for tx in transactions if tx.CustomerID == customer]
+        assert info["total_spent"] == round(sum(tx.Quantity * tx.UnitPrice for tx in rows), 2)
+        assert info["purchase_count"] == len(rows)
+        assert sorted(info["products_bought"]) == sorted({tx.ProductName for tx in rows})
+
+    for day, info in result["daily_trend"].items():
+        rows = [tx for tx in transactions if tx.Date == day]
+        assert info["transaction_count"] == len(rows)
+        assert info["unique_customers"] == len({tx.CustomerID for tx in rows})
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import api_handler
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """
+    Serves server.body with server.etag, answering 304 to a matching
+    If-None-Match, and records every request's headers
+    """
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.server.body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.server.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CatalogHandler)
+    server.etag = '"v1"'
+    server.body = {"products": [{"id": 1, "title": "Laptop"}]}
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/products"
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    """
+    Empties the in-process memo (so every call reads the disk cache) and
+    uses a session without retry backoff
+    """
+    monkeypatch.setattr(api_handler, "_memo", {})
+    monkeypatch.setattr(api_handler, "_session", requests.Session())
+
+
+def get(server, cache_dir, **kwargs):
+    api_handler._memo.clear()
+    return api_handler.cached_get_json(server.url, {"limit": 1}, cache_dir=str(cache_dir), **kwargs)
+
+
+def age_cache(cache_dir, seconds):
+    """
+    Moves every cache entry's fetch time `seconds` into the past
+    """
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        entry["fetched_at"] -= seconds
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+
+
+def test_fresh_entry_is_served_without_a_request(server, tmp_path):
+    assert get(server, tmp_path, ttl=60) == server.body
+    assert get(server, tmp_path, ttl=60) == server.body
+    assert len(server.requests) == 1
+    assert "If-None-Match" not in server.requests[0]
+
+
+def test_expired_entry_is_revalidated_with_its_etag(server, tmp_path):
+    expected = server.body
+    get(server, tmp_path, ttl=60)
+    age_cache(tmp_path, 120)
+
+    assert get(server, tmp_path, ttl=60) == expected
+    assert len(server.requests) == 2
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+
+    # The 304 renewed the entry, so it is fresh again
+    assert get(server, tmp_path, ttl=60) == expected
+    assert len(server.requests) == 2
+
+
+def test_changed_document_replaces_the_entry_after_the_ttl(server, tmp_path):
+    old = server.body
+    get(server, tmp_path, ttl=60)
+    server.etag = '"v2"'
+    server.body = {"products": [{"id": 1, "title": "Laptop Pro"}]}
+
+    assert get(server, tmp_path, ttl=60) == old
+    age_cache(tmp_path, 120)
+    assert get(server, tmp_path, ttl=60) == server.body
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert len(server.requests) == 2
+
+
+def test_offline_serves_the_cache_without_the_network(server, tmp_path):
+    expected = server.body
+    get(server, tmp_path, ttl=60)
+    age_cache(tmp_path, 120)
+    server.shutdown()
+    server.server_close()
+
+    assert get(server, tmp_path, ttl=60, offline=True) == expected
+    # An expired entry is also served stale when the server is unreachable
+    assert get(server, tmp_path, ttl=60) == expected
+    with pytest.raises(requests.ConnectionError):
+        api_handler.cached_get_json(server.url, {"limit": 2}, cache_dir=str(tmp_path), offline=True)
+    assert len(server.requests) == 1
@@ -0,0 +1,93 @@
+import pytest
+
+from utils import data_processor as dp
+from utils.transaction_table import TransactionTable
+
+pytest.importorskip("numpy")
+
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|2|45000.0|C001|North",
+    "T002|2024-12-01|P102|Mouse|10|500.0|C002|South",
+    "T003|2024-12-02|P103|Keyboard|3|1500.0|C001|North",
+    "T004|2024-12-02|P101|Laptop|1|45000.0|C003|East",
+    "T005|2024-12-02|P104|Monitor|2|12000.0|C002|South",
+    "T006|2024-12-03|P102|Mouse|25|500.0|C004|West",
+    "T007|2024-12-03|P105|Webcam|1|3000.0|C001|North",
+    "T008|2024-12-05|P103|Keyboard|4|1500.0|C005|East",
+    "T009|2024-12-05|P104|Monitor|1|12000.0|C003|East",
+    "T010|2024-12-08|P106|Headphones|2|2500.0|C004|West",
+    "T011|2024-12-08|P101|Laptop|1|45000.0|C005|South",
+    "T012|2024-12-09|P105|Webcam|6|3000.0|C002|North",
+    # Invalid rows, rejected by validation
+    "T013|2024-12-09|P101|Laptop|0|45000.0|C001|North",
+    "X014|2024-12-09|P102|Mouse|1|500.0|C002|South",
+    "T015|2024-12-10|P103|Keyboard|1|1500.0|C003|",
+]
+
+FILTERS = [
+    (None, None, None),
+    ("North", None, None),
+    (None, 5000.0, None),
+    (None, None, 20000.0),
+    ("East", 2000.0, 50000.0),
+]
+
+FUNCTIONS = [
+    ("calculate_total_revenue", {}),
+    ("region_wise_sales", {}),
+    ("top_selling_products", {"n": 3}),
+    ("customer_analysis", {}),
+    ("daily_sales_trend", {}),
+    ("find_peak_sales_day", {}),
+    ("low_performing_products", {"threshold": 5}),
+    ("analyze_sales", {"n": 3, "threshold": 5}),
+]
+
+
+def normalize(result):
+    """
+    Sorts products_bought: both backends list each customer's products in
+    first-seen order, but the Python backend collects them in a set
+    """
+    if not isinstance(result, dict):
+        return result
+    if "customers" in result:
+        return {**result, "customers": normalize(result["customers"])}
+    return {
+        key: {**value, "products_bought": sorted(value["products_bought"])}
+        if isinstance(value, dict) and "products_bought" in value else value
+        for key, value in result.items()
+    }
+
+
+def transactions(region, min_amount, max_amount):
+    parsed = dp.parse_transactions(LINES)
+    filtered, _, _, _, _ = dp._validate_and_filter(parsed, region, min_amount, max_amount)
+    return filtered
+
+
+@pytest.mark.parametrize("as_table", [False, True], ids=["records", "table"])
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+@pytest.mark.parametrize("name, kwargs", FUNCTIONS, ids=[name for name, _ in FUNCTIONS])
+def test_numpy_matches_python(name, kwargs, filters, as_table):
+    rows = transactions(*filters)
+    assert rows
+    if as_table:
+        rows = TransactionTable.from_transactions(rows)
+    function = getattr(dp, name)
+
+    expected = normalize(function(rows, backend="python", **kwargs))
+    actual = normalize(function(rows, backend="numpy", **kwargs))
+
+    assert actual == expected
+    # Same key order, as the reports print them
+    assert repr(actual) == repr(expected)
+
+
+@pytest.mark.parametrize("name, kwargs", FUNCTIONS, ids=[name for name, _ in FUNCTIONS])
+def test_numpy_matches_python_without_rows(name, kwargs):
+    function = getattr(dp, name)
+    assert normalize(function([], backend="numpy", **kwargs)) == normalize(
+        function([], backend="python", **kwargs)
+    )
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from utils import data_processor as dp
+from utils.query_index import TransactionIndex, scan_filter
+from utils.transaction_table import TransactionTable
+
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def random_table(rows, seed):
+    rng = random.Random(seed)
+    lines = [
+        f"T{i:04d}|2024-12-{rng.randint(1, 28):02d}|P10{rng.randint(1, 9)}|Item|"
+        f"{rng.randint(1, 20)}|{rng.choice([100.0, 250.0, 999.5, 1500.0])}|"
+        f"C{rng.randint(1, 50):03d}|{rng.choice(REGIONS)}"
+        for i in range(rows)
+    ]
+    return TransactionTable.from_transactions(dp.parse_transactions(lines))
+
+
+def unfiltered_summary(table):
+    _, _, summary, _, _ = dp._validate_and_filter(list(table))
+    return summary
+
+
+QUERIES = [
+    (None, None, None),
+    ("North", None, None),
+    (None, 2000.0, None),
+    (None, None, 5000.0),
+    ("East", 1000.0, 10000.0),
+    ("West", 3000.0, 2000.0),
+    ("Nowhere", None, None),
+]
+
+
+@pytest.mark.parametrize("region, min_amount, max_amount", QUERIES)
+def test_index_and_scan_match_the_list_filter(region, min_amount, max_amount):
+    table = random_table(500, seed=7)
+    expected, _, expected_summary, _, _ = dp._validate_and_filter(
+        list(table), region, min_amount, max_amount
+    )
+
+    index_summary = unfiltered_summary(table)
+    by_index = TransactionIndex(table).filter(index_summary, region, min_amount, max_amount)
+    scan_summary = unfiltered_summary(table)
+    by_scan, amount_range = scan_filter(table, scan_summary, region, min_amount, max_amount)
+
+    assert list(by_index) == expected
+    assert list(by_scan) == expected
+    assert index_summary == expected_summary
+    assert scan_summary == expected_summary
+
+    amounts = [tx.Quantity * tx.UnitPrice for tx in table if not region or tx.Region == region]
+    assert amount_range == ((min(amounts), max(amounts)) if amounts else None)
+    assert amount_range == TransactionIndex(table).amount_range(region)
+
+
+def test_index_query_by_date_matches_a_brute_force_scan():
+    table = random_table(500, seed=3)
+    index = TransactionIndex(table)
+    for region, min_amount, max_amount in QUERIES:
+        for date in ["2024-12-01", "2024-12-15", "2024-12-31"]:
+            expected = [
+                row for row, tx in enumerate(table)
+                if tx.Date == date
+                and (not region or tx.Region == region)
+                and (min_amount is None or tx.Quantity * tx.UnitPrice >= min_amount)
+                and (max_amount is None or tx.Quantity * tx.UnitPrice <= max_amount)
+            ]
+            assert index.query(region, min_amount, max_amount, date) == expected
@@ -0,0 +1,114 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from utils.rollups import DailySeries
+
+
+FIRST = date(2024, 1, 29)
+
+
+def random_daily(seed, days=150, density=0.3):
+    """
+    Returns: date string -> (revenue, count, customers) on a random subset
+    of days; whole-number revenues from a small set, so ties are common
+    and every sum is exact
+    """
+    rng = random.Random(seed)
+    return {
+        (FIRST + timedelta(days=offset)).isoformat(): (
+            float(rng.choice([100, 200, 300])), rng.randint(1, 5), rng.randint(1, 3)
+        )
+        for offset in range(days) if rng.random() < density
+    }
+
+
+def every_day(daily):
+    """
+    Brute force: one (date, revenue, count, customers) per calendar day
+    from the first to the last sale, zero on days without sales
+    """
+    days = sorted(date.fromisoformat(day) for day in daily)
+    result = []
+    day = days[0]
+    while day <= days[-1]:
+        revenue, count, customers = daily.get(day.isoformat(), (0.0, 0, 0))
+        result.append((day, revenue, count, customers))
+        day += timedelta(days=1)
+    return result
+
+
+def grouped(calendar, label):
+    periods = {}
+    for day, revenue, count, _ in calendar:
+        entry = periods.setdefault(label(day), [0.0, 0])
+        entry[0] += revenue
+        entry[1] += count
+    return [(key, revenue, count) for key, (revenue, count) in periods.items()]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_ranges_match_a_day_by_day_scan(seed):
+    daily = random_daily(seed)
+    series = DailySeries.from_daily(daily)
+    calendar = every_day(daily)
+    rng = random.Random(seed)
+
+    for _ in range(200):
+        start = FIRST + timedelta(days=rng.randint(-10, 160))
+        end = start + timedelta(days=rng.randint(-2, 60))
+        days = [row for row in calendar if start <= row[0] <= end]
+        assert series.total(start.isoformat(), end.isoformat()) == (
+            sum(row[1] for row in days), sum(row[2] for row in days), sum(row[3] for row in days)
+        )
+
+        sale_days = [row for row in days if row[0].isoformat() in daily]
+        if sale_days:
+            best = max(sale_days, key=lambda row: row[1])  # earliest on ties
+            assert series.peak_day(start, end) == (best[0].isoformat(), best[1])
+        else:
+            assert series.peak_day(start, end) == (None, 0)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("window", [1, 3, 7, 30, 500])
+def test_peak_window_and_rolling_match_a_day_by_day_scan(seed, window):
+    daily = random_daily(seed)
+    series = DailySeries.from_daily(daily)
+    calendar = every_day(daily)
+    revenues = [row[1] for row in calendar]
+
+    span = min(window, len(calendar))
+    sums = [sum(revenues[i:i + span]) for i in range(len(calendar) - span + 1)]
+    best = sums.index(max(sums))  # earliest on ties
+    assert series.peak_window(window) == (
+        calendar[best][0].isoformat(), calendar[best + span - 1][0].isoformat(), sums[best]
+    )
+
+    assert series.rolling(window) == [
+        (day.isoformat(), sum(revenues[max(0, i - window + 1):i + 1]))
+        for i, (day, *_) in enumerate(calendar) if day.isoformat() in daily
+    ]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_periods_match_a_day_by_day_scan(seed):
+    daily = random_daily(seed)
+    series = DailySeries.from_daily(daily)
+    calendar = every_day(daily)
+
+    assert series.weekly() == grouped(
+        calendar, lambda day: (day - timedelta(days=day.weekday())).isoformat()
+    )
+    assert series.monthly() == grouped(calendar, lambda day: day.strftime("%Y-%m"))
+
+
+def test_empty_series():
+    series = DailySeries.from_daily({"not a date": (1.0, 1, 1)})
+
+    assert series.skipped == ["not a date"]
+    assert series.total() == (0.0, 0, 0)
+    assert series.peak_day() == (None, 0)
+    assert series.peak_window(7) is None
+    assert series.weekly() == series.monthly() == []
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from utils import spill
+from utils.data_processor import SalesAggregator, parse_transactions
+from utils.spill import CustomerSpill
+
+
+def random_sales(rows, customers, seed):
+    """
+    Returns: list of (customer, revenue, product); revenues are whole
+    numbers from a small set, so sums are exact and ties are common
+    """
+    rng = random.Random(seed)
+    return [
+        (f"C{rng.randint(1, customers):04d}", float(rng.choice([100, 250, 500])), f"P{rng.randint(1, 5)}")
+        for _ in range(rows)
+    ]
+
+
+def brute_force_ranking(sales):
+    totals = {}
+    for row, (customer, revenue, product) in enumerate(sales, 1):
+        entry = totals.setdefault(customer, [0.0, 0, set(), row])
+        entry[0] += revenue
+        entry[1] += 1
+        entry[2].add(product)
+    ranked = sorted(totals.items(), key=lambda item: (-round(item[1][0], 2), item[1][3]))
+    return [(customer, (spent, count, products)) for customer, (spent, count, products, _) in ranked]
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(spill, "SPILL_DIR", str(tmp_path / "customer_spill"))
+
+
+@pytest.fixture
+def levels(monkeypatch):
+    """
+    Records the level of every partition merged, to see splits happen
+    """
+    seen = []
+    merged_groups = CustomerSpill.merged_groups
+
+    def recording(self, partition):
+        seen.append(self.level)
+        return merged_groups(self, partition)
+
+    monkeypatch.setattr(CustomerSpill, "merged_groups", recording)
+    return seen
+
+
+@pytest.mark.parametrize("n", [None, 1, 7, 1000])
+def test_recursive_spill_ranks_like_a_brute_force_sort(levels, n):
+    sales = random_sales(3000, 300, seed=5)
+    customers = CustomerSpill(max_entries=4, partitions=2)
+    for row, (customer, revenue, product) in enumerate(sales, 1):
+        customers.add(customer, revenue, product, row, lambda *keys: set(keys))
+
+    expected = brute_force_ranking(sales)
+    assert customers.ranked(n) == (expected[:n] if n else expected)
+    assert max(levels) >= 3
+    customers.discard()
+
+
+def test_spill_merge_keeps_first_seen_ties(levels):
+    sales = random_sales(2000, 200, seed=9)
+    left, right = CustomerSpill(max_entries=3, partitions=2), CustomerSpill(max_entries=3, partitions=2)
+    for row, (customer, revenue, product) in enumerate(sales[:1200], 1):
+        left.add(customer, revenue, product, row, lambda *keys: set(keys))
+    for row, (customer, revenue, product) in enumerate(sales[1200:], 1):
+        right.add(customer, revenue, product, row, lambda *keys: set(keys))
+
+    left.merge(right, row_offset=1200)
+    assert left.ranked() == brute_force_ranking(sales)
+    assert max(levels) >= 1
+    left.discard()
+
+
+def test_memory_budget_gives_the_in_memory_customers():
+    rng = random.Random(2)
+    lines = [
+        f"T{i:05d}|2024-12-{rng.randint(1, 28):02d}|P10{rng.randint(1, 5)}|Item|"
+        f"{rng.randint(1, 3)}|{rng.choice([100.0, 250.0])}|C{rng.randint(1, 400):04d}|North"
+        for i in range(4000)
+    ]
+    transactions = parse_transactions(lines)
+
+    for top_customers in (None, 5):
+        expected = SalesAggregator().update(transactions).result(top_customers=top_customers)
+        # 0.002 MB is about 3 customers per partition, so every partition is split
+        spilled = SalesAggregator(memory_budget=0.002).update(transactions)
+        result = spilled.result(top_customers=top_customers)
+        spilled.close()
+
+        assert list(result["customers"]) == list(expected["customers"])
+        for customer, info in result["customers"].items():
+            assert sorted(info.pop("products_bought")) == sorted(
+                expected["customers"][customer].pop("products_bought")
+            )
+        assert result == expected
@@ -0,0 +1,43 @@
+from utils import data_processor as dp
+from utils.api_handler import enrich_sales_data, sold_product_ids
+from utils.transaction_table import TransactionTable
+
+
+LINES = [
+    "T001|2024-12-01|P101|Laptop|2|45000.0|C001|North",
+    "T002|2024-12-01|P102|Mouse|10|500.0|C002|South",
+    "T003|2024-12-02|P103|Keyboard|3|1500.0|C001|North",
+    "T004|2024-12-02|P101|Laptop|1|45000.0|C003|East",
+    "T005|2024-12-03|P104|Monitor|2|12000.0|C002|South",
+]
+
+PRODUCTS = {
+    101: {"category": "laptops", "brand": "Acme", "rating": 4.5},
+    102: {"category": "accessories", "brand": "Acme", "rating": 4.0},
+}
+
+
+def table():
+    return TransactionTable.from_transactions(dp.parse_transactions(LINES))
+
+
+def test_take_reports_only_the_selected_products():
+    full = table()
+    selection = full.take([0, 3])
+
+    assert full.encoded["ProductID"].distinct() == ["P101", "P102", "P103", "P104"]
+    assert selection.encoded["ProductID"].distinct() == ["P101"]
+    assert sold_product_ids(selection) == {101}
+    assert sold_product_ids(full.take([])) == set()
+
+
+def test_enrichment_of_a_filtered_table_counts_its_own_rows():
+    selection = table().take([1, 2, 4])
+    enriched = enrich_sales_data(selection, PRODUCTS)
+
+    assert sold_product_ids(selection) == {102, 103, 104}
+    assert enriched.summary() == {
+        "total": 3,
+        "matched": 1,
+        "failed_products": {"P103": 1, "P104": 1}
+    }
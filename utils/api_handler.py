@@ -1,31 +1,210 @@
+import functools
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from utils.parse_cache import write_table
+from utils.transaction_table import FIELDS, TransactionTable
 
 
 BASE_URL = "https://dummyjson.com/products"
 
+CACHE_DIR = "output/.api_cache"
+CACHE_TTL = 24 * 60 * 60  # seconds
+
+PAGE_SIZE = 100
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # seconds, doubled on every retry
+REQUEST_TIMEOUT = 10  # seconds, per page
+
+# In-process memo: repeated calls within one run never touch disk or network
+_memo = {}
+
+_session = None
+_session_lock = threading.Lock()
+
 
-def fetch_all_products():
+def get_session():
     """
-    Fetches all products from DummyJSON API (limit=100)
-    Returns: list of product dictionaries
+    Returns the shared keep-alive session, sized for MAX_CONCURRENCY pooled
+    connections and retrying transient failures with exponential backoff
     """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+            adapter = HTTPAdapter(
+                pool_connections=MAX_CONCURRENCY,
+                pool_maxsize=MAX_CONCURRENCY,
+                max_retries=retry
+            )
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _cache_key(url, params):
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+
+def _load_cache_entry(path):
     try:
-        response = requests.get(f"{BASE_URL}?limit=100", timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print("API Fetch Successful")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_cache_entry(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(temp_path, path)
+
+
+def cached_get_json(url, params=None, ttl=CACHE_TTL, cache_dir=CACHE_DIR, timeout=REQUEST_TIMEOUT,
+                    offline=False):
+    """
+    GETs a JSON document through an on-disk cache keyed by endpoint and query.
+
+    Fresh entries (younger than ttl seconds) are served without a request.
+    Expired entries are revalidated with If-None-Match / If-Modified-Since,
+    and served stale if the network is unavailable.
+    offline: never touch the network, serve any cached entry or raise
+    requests.ConnectionError
+    Returns: decoded JSON
+    """
+    key = _cache_key(url, params)
+    if key in _memo:
+        return _memo[key]
+
+    path = os.path.join(cache_dir, key + ".json")
+    entry = _load_cache_entry(path)
+    now = time.time()
+
+    if entry and (offline or now - entry["fetched_at"] < ttl):
+        _memo[key] = entry["data"]
+        return entry["data"]
+    if offline:
+        raise requests.ConnectionError(f"offline and no cached copy of {url}")
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = now
+        else:
+            response.raise_for_status()
+            entry = {
+                "url": url,
+                "params": params,
+                "fetched_at": now,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "data": response.json()
+            }
+        _save_cache_entry(path, entry)
+    except (requests.RequestException, ValueError) as e:
+        if not entry:
+            raise
+        age = (now - entry["fetched_at"]) / 3600
+        print(f"API unavailable ({e}), using cached copy from {age:.1f} hours ago")
+
+    _memo[key] = entry["data"]
+    return entry["data"]
+
+
+def fetch_all_products(base_url=BASE_URL, ttl=CACHE_TTL, cache_dir=CACHE_DIR,
+                       page_size=PAGE_SIZE, max_workers=MAX_CONCURRENCY, product_map=None):
+    """
+    Fetches the whole product catalog from DummyJSON API page by page
+    (skip/limit). The first page reports the catalog size, the remaining
+    pages are requested concurrently over the shared session. Every page
+    goes through the on-disk catalog cache.
+
+    product_map: optional dict, filled (see update_product_mapping) as
+    pages arrive
+
+    Returns: list of product dictionaries, in catalog order
+    """
+    def fetch_page(skip):
+        params = {"limit": page_size, "skip": skip}
+        data = cached_get_json(base_url, params, ttl=ttl, cache_dir=cache_dir)
         return data.get("products", [])
+
+    try:
+        first = cached_get_json(
+            base_url, {"limit": page_size, "skip": 0}, ttl=ttl, cache_dir=cache_dir
+        )
     except Exception as e:
         print("API Fetch Failed:", e)
         return []
 
+    pages = {0: first.get("products", [])}
+    if product_map is not None:
+        update_product_mapping(product_map, pages[0])
+
+    total = first.get("total", len(pages[0]))
+    skips = range(page_size, total, page_size)
+
+    if skips:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_page, skip): skip for skip in skips}
+            for future in as_completed(futures):
+                skip = futures[future]
+                try:
+                    pages[skip] = future.result()
+                except Exception as e:
+                    print(f"API Fetch Failed for page skip={skip}:", e)
+                    continue
+                if product_map is not None:
+                    update_product_mapping(product_map, pages[skip])
+
+    print("API Fetch Successful")
+    return [product for skip in sorted(pages) for product in pages[skip]]
+
 
 def create_product_mapping(api_products):
     """
     Creates mapping of product ID to product info
     """
-    product_map = {}
+    return update_product_mapping({}, api_products)
 
+
+def update_product_mapping(product_map, api_products):
+    """
+    Adds products to an existing product ID mapping
+    """
     for product in api_products:
         product_id = product.get("id")
         if product_id is not None:
@@ -39,56 +218,312 @@ def create_product_mapping(api_products):
     return product_map
 
 
-def enrich_sales_data(transactions, product_mapping):
+def fetch_products(product_ids, base_url=BASE_URL, ttl=CACHE_TTL, cache_dir=CACHE_DIR,
+                   max_workers=MAX_CONCURRENCY):
     """
-    Enriches transactions with API product data
+    Fetches only the given product IDs ({base_url}/{id}), concurrently over
+    the shared session and through the catalog cache. Once the network is
+    found to be down, the remaining IDs are served from cache only.
+    Prints nothing, so it can run in the background.
+
+    Returns: (product ID mapping (see create_product_mapping), whether the
+    network was unavailable)
     """
-    enriched = []
+    network_down = threading.Event()
+
+    def fetch_one(product_id):
+        try:
+            return cached_get_json(
+                f"{base_url}/{product_id}", ttl=ttl, cache_dir=cache_dir,
+                offline=network_down.is_set()
+            )
+        except requests.ConnectionError:
+            network_down.set()
+        except requests.RequestException:
+            pass  # unknown product ID (404) or server error
+        return None
+
+    product_ids = sorted(product_ids)
+    if not product_ids:
+        return {}, False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        products = [p for p in pool.map(fetch_one, product_ids) if p]
+
+    return create_product_mapping(products), network_down.is_set()
+
 
-    for tx in transactions:
-        tx_copy = tx.copy()
+def print_fetch_status(network_down):
+    if network_down:
+        print("API Fetch Failed: network unavailable, using cached products only")
+    else:
+        print("API Fetch Successful")
 
-        product_id_raw = tx.get("product_id", "")
-        numeric_id = "".join(filter(str.isdigit, product_id_raw))
 
-        api_data = None
-        if numeric_id:
-            api_data = product_mapping.get(int(numeric_id))
+def fetch_products_by_ids(product_ids, base_url=BASE_URL, ttl=CACHE_TTL, cache_dir=CACHE_DIR,
+                          max_workers=MAX_CONCURRENCY):
+    """
+    fetch_products, reporting whether the API was reachable
+    Returns: product ID mapping (see create_product_mapping)
+    """
+    if not product_ids:
+        return {}
+    product_map, network_down = fetch_products(product_ids, base_url, ttl, cache_dir, max_workers)
+    print_fetch_status(network_down)
+    return product_map
 
+
+@functools.lru_cache(maxsize=None)
+def decode_product_id(product_id):
+    """
+    Extracts the numeric API ID from a ProductID such as "P101"
+    Returns: int, or None when the ID has no digits
+    """
+    numeric_id = "".join(filter(str.isdigit, product_id or ""))
+    return int(numeric_id) if numeric_id else None
+
+
+def _product_codes(transactions):
+    """
+    Dictionary-encodes the ProductID column
+    Returns: (distinct ProductIDs, per-row codes)
+    """
+    if isinstance(transactions, TransactionTable):
+        column = transactions.encoded["ProductID"]
+        return column.values, column.codes
+
+    lookup = {}
+    codes = [lookup.setdefault(tx.ProductID, len(lookup)) for tx in transactions]
+    return list(lookup), codes
+
+
+def sold_product_ids(transactions):
+    """
+    Returns: set of numeric API IDs for the products that were actually sold
+    """
+    if isinstance(transactions, TransactionTable):
+        values = transactions.encoded["ProductID"].distinct()
+    else:
+        values, _ = _product_codes(transactions)
+    ids = {decode_product_id(value) for value in values}
+    ids.discard(None)
+    return ids
+
+
+def new_enrichment_summary():
+    """
+    Returns: empty enrichment summary (see EnrichedSales.summary)
+    """
+    return {"total": 0, "matched": 0, "failed_products": {}}
+
+
+def merge_enrichment_summaries(into, summary):
+    """
+    Adds one enrichment summary into another, e.g. across incremental runs
+    """
+    into["total"] += summary["total"]
+    into["matched"] += summary["matched"]
+    failed = into["failed_products"]
+    for product_id, count in summary["failed_products"].items():
+        failed[product_id] = failed.get(product_id, 0) + count
+    return into
+
+
+class EnrichedSales:
+    """
+    Transactions plus one shared enrichment record per distinct ProductID.
+    Rows reference their product's record by code instead of copying it;
+    iterating yields the merged row dictionaries one at a time.
+    """
+
+    def __init__(self, transactions, product_ids, codes, records):
+        self.transactions = transactions
+        self.product_ids = product_ids
+        self.codes = codes
+        self.records = records
+
+        self.per_product = [0] * len(records)
+        for code in codes:
+            self.per_product[code] += 1
+        self.matched = sum(
+            count for count, record in zip(self.per_product, records) if record["API_Match"]
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return {**self.transactions[index], **self.records[self.codes[index]]}
+
+    def __iter__(self):
+        records = self.records
+        for tx, code in zip(self.transactions, self.codes):
+            row = dict(zip(FIELDS, tx))
+            row.update(records[code])
+            yield row
+
+    def summary(self):
+        """
+        Returns: dict with total, matched and failed_products (unmatched
+        rows per ProductID, in first-seen order)
+        """
+        return {
+            "total": len(self),
+            "matched": self.matched,
+            "failed_products": {
+                product_id: count
+                for product_id, count, record in zip(self.product_ids, self.per_product, self.records)
+                if count and not record["API_Match"]
+            }
+        }
+
+
+def enrich_sales_data(transactions, product_mapping):
+    """
+    Enriches transactions with API product data. Each distinct ProductID is
+    decoded and looked up once; rows share their product's record.
+    Returns: EnrichedSales
+    """
+    product_ids, codes = _product_codes(transactions)
+
+    records = []
+    for product_id in product_ids:
+        api_data = product_mapping.get(decode_product_id(product_id))
         if api_data:
-            tx_copy["API_Category"] = api_data["category"]
-            tx_copy["API_Brand"] = api_data["brand"]
-            tx_copy["API_Rating"] = api_data["rating"]
-            tx_copy["API_Match"] = True
+            records.append({
+                "API_Category": api_data["category"],
+                "API_Brand": api_data["brand"],
+                "API_Rating": api_data["rating"],
+                "API_Match": True
+            })
         else:
-            tx_copy["API_Category"] = None
-            tx_copy["API_Brand"] = None
-            tx_copy["API_Rating"] = None
-            tx_copy["API_Match"] = False
+            records.append({
+                "API_Category": None,
+                "API_Brand": None,
+                "API_Rating": None,
+                "API_Match": False
+            })
+
+    return EnrichedSales(transactions, product_ids, codes, records)
 
-        enriched.append(tx_copy)
 
-    return enriched
+ENRICHED_FILE = "output/enriched_sales_data.txt"
+ENRICHED_HEADERS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region",
+    "API_Category", "API_Brand", "API_Rating", "API_Match"
+]
+WRITE_BATCH = 10_000  # rows joined into one write call
 
 
-def save_enriched_data(enriched_transactions, filename="output/enriched_sales_data.txt"):
+def output_format(filename):
     """
-    Saves enriched transactions to file
+    Picks the enriched output format from the file name:
+    .gz -> gzip text, .zst -> zstandard text, .bin -> columnar, else text
     """
-    headers = [
-        "TransactionID", "Date", "ProductID", "ProductName",
-        "Quantity", "UnitPrice", "CustomerID", "Region",
-        "API_Category", "API_Brand", "API_Rating", "API_Match"
-    ]
+    if filename.endswith(".gz"):
+        return "gzip"
+    if filename.endswith(".zst"):
+        return "zstd"
+    if filename.endswith(".bin"):
+        return "columnar"
+    return "text"
+
 
-    with open(filename, "w") as f:
-        f.write("|".join(headers) + "\n")
+def _open_text_output(filename, fmt, append):
+    mode = "a" if append else "w"
+    if fmt == "gzip":
+        # Appending adds a gzip member; readers see one continuous stream
+        return gzip.open(filename, mode + "t", encoding="utf-8", compresslevel=6)
+    if fmt == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd output requires zstandard (pip install zstandard)")
+        raw = open(filename, mode + "b")
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(filename, mode, encoding="utf-8", buffering=1024 * 1024)
 
+
+def iter_enriched_lines(enriched_transactions):
+    """
+    Yields the pipe-delimited output line of every enriched row, one at a
+    time. Each product's enrichment columns are formatted once and the
+    row fields are unpacked directly (table columns or Transaction
+    records), so no per-row dictionary is built.
+    """
+    if not isinstance(enriched_transactions, EnrichedSales):
         for tx in enriched_transactions:
-            row = [str(tx.get(h, "")) for h in headers]
-            f.write("|".join(row) + "\n")
+            yield "|".join(str(tx.get(h, "")) for h in ENRICHED_HEADERS) + "\n"
+        return
+
+    suffixes = [
+        "|".join(str(record[h]) for h in ENRICHED_HEADERS[8:]) + "\n"
+        for record in enriched_transactions.records
+    ]
+    transactions = enriched_transactions.transactions
+    if isinstance(transactions, TransactionTable):
+        encoded = transactions.encoded
+        rows = zip(
+            transactions.transaction_ids, encoded["Date"], encoded["ProductID"],
+            encoded["ProductName"], transactions.quantity, transactions.unit_price,
+            encoded["CustomerID"], encoded["Region"]
+        )
+    else:
+        # Transaction records hold their fields in header order
+        rows = transactions
+    for (tid, date, pid, name, quantity, price, customer, region), code in zip(
+        rows, enriched_transactions.codes
+    ):
+        yield f"{tid}|{date}|{pid}|{name}|{quantity}|{price}|{customer}|{region}|{suffixes[code]}"
+
+
+def _save_columnar(enriched_transactions, filename):
+    """
+    Writes the rows as a columnar table file (see parse_cache.write_table)
+    with the per-product enrichment records in its header
+    """
+    transactions = getattr(enriched_transactions, "transactions", enriched_transactions)
+    if not isinstance(transactions, TransactionTable):
+        transactions = TransactionTable.from_transactions(transactions)
+    records = dict(zip(enriched_transactions.product_ids, enriched_transactions.records))
+    write_table(transactions, filename, {"enrichment": records})
+
+
+def save_enriched_data(enriched_transactions, filename=ENRICHED_FILE, append=False, fmt=None):
+    """
+    Streams enriched transactions to file in batches of WRITE_BATCH lines,
+    so memory stays constant however many rows there are
+    append: add rows to an existing file, writing the header only if it is new
+    fmt: "text", "gzip", "zstd" or "columnar"; by default from the file name
+
+    Returns: number of rows written
+    """
+    fmt = fmt or output_format(filename)
+    if fmt == "columnar":
+        if append:
+            raise ValueError("Columnar enriched output cannot be appended to")
+        _save_columnar(enriched_transactions, filename)
+        print(f"Enriched data saved to {filename}")
+        return len(enriched_transactions)
+
+    write_header = not (append and os.path.exists(filename) and os.path.getsize(filename))
+
+    count = 0
+    with _open_text_output(filename, fmt, append) as f:
+        if write_header:
+            f.write("|".join(ENRICHED_HEADERS) + "\n")
+
+        lines = iter_enriched_lines(enriched_transactions)
+        while True:
+            batch = list(islice(lines, WRITE_BATCH))
+            if not batch:
+                break
+            f.write("".join(batch))
+            count += len(batch)
 
     print(f"Enriched data saved to {filename}")
+    return count
+
 
 def api_summary(api_products):
     return {
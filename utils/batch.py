@@ -0,0 +1,168 @@
+import json
+import os
+import re
+
+from utils.api_handler import new_enrichment_summary
+from utils.data_processor import SalesAggregator
+
+
+BATCH_DIR = "output/batch"
+
+# Short spellings accepted in --query specs
+QUERY_ALIASES = {"min": "min_amount", "max": "max_amount"}
+QUERY_KEYS = ["name", "region", "min_amount", "max_amount"]
+
+
+def _normalize_query(query, number):
+    """
+    Checks one filter spec and fills in defaults
+    Returns: dict with name, region, min_amount, max_amount
+    """
+    query = {QUERY_ALIASES.get(key, key): value for key, value in query.items()}
+    unknown = set(query) - set(QUERY_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown query keys: {', '.join(sorted(unknown))}")
+
+    normalized = {
+        "name": str(query.get("name") or f"query{number}"),
+        "region": query.get("region") or None,
+        "min_amount": None,
+        "max_amount": None
+    }
+    for key in ("min_amount", "max_amount"):
+        if query.get(key) not in (None, ""):
+            normalized[key] = float(query[key])
+    return normalized
+
+
+def parse_query_spec(spec, number=1):
+    """
+    Parses a command-line query such as "name=north,region=North,min=500"
+    Returns: query dict (see load_queries)
+    """
+    query = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Bad query part '{part}', expected key=value")
+        query[key.strip()] = value.strip()
+    return _normalize_query(query, number)
+
+
+def load_queries(filename):
+    """
+    Reads a JSON list of filter specs, each with optional name, region,
+    min_amount and max_amount
+
+    Returns: list of query dicts
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{filename} must contain a JSON list of queries")
+    return check_query_names(
+        [_normalize_query(spec, number) for number, spec in enumerate(specs, 1)]
+    )
+
+
+def query_slug(name):
+    """
+    Returns: the file name prefix for a query name
+    """
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+def check_query_names(queries):
+    """
+    Raises: ValueError when two queries would write the same report files
+    (the same name, or names that differ only in characters a file name
+    cannot hold)
+    Returns: queries
+    """
+    seen = {}
+    for query in queries:
+        slug = query_slug(query["name"])
+        if slug in seen:
+            if seen[slug] == query["name"]:
+                raise ValueError(f"Two queries are named '{slug}'; query names must be unique")
+            raise ValueError(
+                f"Queries '{seen[slug]}' and '{query['name']}' would both write "
+                f"{slug}_report.txt; give them distinct names"
+            )
+        seen[slug] = query["name"]
+    return queries
+
+
+def report_paths(query, output_dir=BATCH_DIR):
+    """
+    Returns: (report file, summary file, snapshot file) for one query
+    """
+    slug = query_slug(query["name"])
+    return (
+        os.path.join(output_dir, f"{slug}_report.txt"),
+        os.path.join(output_dir, f"{slug}_summary.txt"),
+        os.path.join(output_dir, f"{slug}_snapshot.json")
+    )
+
+
+def run_queries(table, queries, aggregator_options=None, enriched=None):
+    """
+    Aggregates every query in one pass over a validated TransactionTable:
+    each row is routed to the aggregator of every query whose region and
+    amount range it matches
+
+    enriched: optional EnrichedSales over the same table, for per-query
+    enrichment summaries
+
+    Returns: list of (query, SalesAggregator, enrichment summary dict)
+    """
+    aggregator_options = aggregator_options or {}
+    results = [
+        (query, SalesAggregator(**aggregator_options),
+         new_enrichment_summary())
+        for query in queries
+    ]
+
+    # Per region code, the queries that can match it (their own region or any)
+    regions = table.encoded["Region"]
+    routes = []
+    for region in regions.values:
+        routes.append([
+            (query["min_amount"], query["max_amount"], aggregator.add, enrichment)
+            for query, aggregator, enrichment in results
+            if query["region"] is None or query["region"] == region
+        ])
+
+    encoded = table.encoded
+    if enriched is not None:
+        records = enriched.records
+        product_codes = enriched.codes
+        product_ids = enriched.product_ids
+    else:
+        records = product_codes = None
+
+    rows = zip(
+        regions.codes, encoded["Date"], encoded["ProductName"], encoded["CustomerID"],
+        regions, table.quantity, table.revenue
+    )
+    for row, (region_code, date, product, customer, region, quantity, revenue) in enumerate(rows):
+        for min_amount, max_amount, add, enrichment in routes[region_code]:
+            if min_amount is not None and revenue < min_amount:
+                continue
+            if max_amount is not None and revenue > max_amount:
+                continue
+            add(date, product, customer, region, quantity, revenue)
+
+            if records is not None:
+                code = product_codes[row]
+                enrichment["total"] += 1
+                if records[code]["API_Match"]:
+                    enrichment["matched"] += 1
+                else:
+                    product_id = product_ids[code]
+                    failed = enrichment["failed_products"]
+                    failed[product_id] = failed.get(product_id, 0) + 1
+
+    return results
@@ -1,137 +1,322 @@
-def parse_transactions(raw_lines):
+import gc
+import heapq
+import operator
+import sys
+from itertools import compress, islice, repeat
+from operator import attrgetter
+
+from utils.transaction_table import TransactionTable, Transaction
+from utils.profiler import profiled, profiled_method
+from utils.rollups import trend_rollups
+from utils.sketches import SpaceSaving, CountMinSketch, HyperLogLog, DistinctCounter
+from utils.spill import CustomerSpill
+
+
+BACKENDS = ["python", "numpy"]
+
+
+def _numpy_backend():
+    """
+    Imports the vectorized backend on demand so numpy stays optional
     """
-    Parses raw lines into clean list of dictionaries
+    from utils import numpy_backend
+    numpy_backend._require_numpy()
+    return numpy_backend
+
+
+@profiled
+def iter_transactions(raw_lines, rejects=None):
     """
-    transactions = []
+    Lazily parses raw lines into Transaction records, one at a time
 
-    for line in raw_lines:
+    rejects: optional list, receives (record_number, reason, line) for every
+    malformed row instead of dropping it silently
+    """
+    intern = sys.intern
+    new_record = tuple.__new__
+
+    for number, line in enumerate(raw_lines, 1):
         parts = line.split("|")
 
         # Skip incorrect rows
         if len(parts) != 8:
+            if rejects is not None:
+                rejects.append((number, f"expected 8 fields, found {len(parts)}", line))
             continue
 
-        try:
-            transaction_id = parts[0]
-            date = parts[1]
-            product_id = parts[2]
-
-            # Handle commas in product name
-            product_name = parts[3].replace(",", "")
-
-            # Remove commas from numbers
-            quantity = int(parts[4].replace(",", ""))
-            unit_price = float(parts[5].replace(",", ""))
-
-            customer_id = parts[6]
-            region = parts[7]
-
-            transaction = {
-                "TransactionID": transaction_id,
-                "Date": date,
-                "ProductID": product_id,
-                "ProductName": product_name,
-                "Quantity": quantity,
-                "UnitPrice": unit_price,
-                "CustomerID": customer_id,
-                "Region": region
-            }
+        transaction_id, date, product_id, product_name, quantity, unit_price, customer_id, region = parts
 
-            transactions.append(transaction)
+        # Handle commas in product name and numbers, only when present
+        if "," in product_name:
+            product_name = product_name.replace(",", "")
+        if "," in quantity:
+            quantity = quantity.replace(",", "")
+        if "," in unit_price:
+            unit_price = unit_price.replace(",", "")
 
+        try:
+            quantity = int(quantity)
         except ValueError:
+            if rejects is not None:
+                rejects.append((number, f"invalid Quantity {quantity!r}", line))
             continue
+        try:
+            unit_price = float(unit_price)
+        except ValueError:
+            if rejects is not None:
+                rejects.append((number, f"invalid UnitPrice {unit_price!r}", line))
+            continue
+
+        # Low-cardinality strings are interned so rows share one copy
+        yield new_record(Transaction, (
+            transaction_id, intern(date), intern(product_id), intern(product_name),
+            quantity, unit_price, customer_id, intern(region)
+        ))
 
-    return transactions
+
+@profiled
+def parse_transactions(raw_lines, rejects=None):
+    """
+    Parses raw lines into clean list of Transaction records
+    """
+    # Records never form reference cycles; pausing the cyclic GC avoids
+    # repeated collections over the growing list
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(iter_transactions(raw_lines, rejects))
+    finally:
+        if gc_enabled:
+            gc.enable()
+@profiled
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
     """
     Validates transactions and applies optional filters
     """
-    valid_transactions = []
-    invalid_count = 0
+    filtered, invalid_count, summary, regions, amount_range = _validate_and_filter(
+        transactions, region, min_amount, max_amount
+    )
 
-    total_input = len(transactions)
+    # Display available regions
+    print("Available Regions:", regions)
+    if amount_range:
+        print("Transaction Amount Range:", amount_range[0], "-", amount_range[1])
 
-    for tx in transactions:
-        try:
-            if not tx["Region"]:
-               invalid_count += 1
-               continue
+    return filtered, invalid_count, summary
 
-            if tx["Quantity"] <= 0:
-                invalid_count += 1
-                continue
 
-            if tx["UnitPrice"] <= 0:
-                invalid_count += 1
-                continue
+# Validity rules: (name, field, predicate, operand); a row is valid when
+# predicate(row.field, operand) holds for every rule. The first failing rule
+# rejects the row and is the one counted. Predicates are C functions, so a
+# rule runs over a whole column without a Python call per row, and their
+# reprs are stable (parse_cache hashes the rules into its key).
+VALIDATION_RULES = [
+    ("missing_region", "Region", operator.ne, ""),
+    ("non_positive_quantity", "Quantity", operator.gt, 0),
+    ("non_positive_price", "UnitPrice", operator.gt, 0),
+    ("bad_transaction_id", "TransactionID", str.startswith, "T"),
+    ("bad_product_id", "ProductID", str.startswith, "P"),
+    ("bad_customer_id", "CustomerID", str.startswith, "C"),
+]
 
-            if not tx["TransactionID"].startswith("T"):
-                invalid_count += 1
-                continue
+# User filters, counted separately from invalid rows
+FILTER_RULES = ["region_filter", "min_amount", "max_amount"]
 
-            if not tx["ProductID"].startswith("P"):
-                invalid_count += 1
-                continue
+_get_region = attrgetter("Region")
+_get_quantity = attrgetter("Quantity")
+_get_unit_price = attrgetter("UnitPrice")
 
-            if not tx["CustomerID"].startswith("C"):
-                invalid_count += 1
-                continue
 
-            valid_transactions.append(tx)
+def _rule_step(name, field, predicate, operand):
+    """
+    Returns: step(rows, rejected) -> rows passing the rule, counting the
+    others under `name`
+    """
+    get = attrgetter(field)
+
+    def step(rows, rejected):
+        kept = list(compress(rows, map(predicate, map(get, rows), repeat(operand))))
+        rejected[name] += len(rows) - len(kept)
+        return kept
 
-        except KeyError:
-            invalid_count += 1
+    return step
 
-    # Display available regions
-    regions = set(tx["Region"] for tx in valid_transactions)
-    print("Available Regions:", regions)
 
-    filtered = valid_transactions
+def _keep(rows, amounts, passed):
+    """
+    Returns: (rows, amounts) where `passed` (a list of booleans) is true
+    """
+    return list(compress(rows, passed)), list(compress(amounts, passed))
+
+
+def build_validator(rules=VALIDATION_RULES):
+    """
+    Composes the validity rules and the region/amount filters into one
+    function. Each rule and filter is applied column-wise to the rows that
+    passed the previous ones, and each row's amount is computed once.
+
+    Returns: validate(transactions, region, min_amount, max_amount) ->
+    (filtered, rejected_by_rule, regions, total_input, amount_range)
+    """
+    steps = [_rule_step(*rule) for rule in rules]
+    rule_names = [name for name, _, _, _ in rules] + FILTER_RULES
+
+    def validate(transactions, region, min_amount, max_amount):
+        rows = transactions if isinstance(transactions, list) else list(transactions)
+        total_input = len(rows)
+        rejected = dict.fromkeys(rule_names, 0)
 
-    if region:
-        filtered = [tx for tx in filtered if tx["Region"] == region]
+        for step in steps:
+            rows = step(rows, rejected)
 
-    amounts = [tx["Quantity"] * tx["UnitPrice"] for tx in filtered]
-    if amounts:
-        print("Transaction Amount Range:", min(amounts), "-", max(amounts))
+        regions = set(map(_get_region, rows))
 
-    if min_amount:
-        filtered = [tx for tx in filtered if tx["Quantity"] * tx["UnitPrice"] >= min_amount]
+        if region:
+            kept = list(compress(rows, map(operator.eq, map(_get_region, rows), repeat(region))))
+            rejected["region_filter"] = len(rows) - len(kept)
+            rows = kept
 
-    if max_amount:
-        filtered = [tx for tx in filtered if tx["Quantity"] * tx["UnitPrice"] <= max_amount]
+        amounts = list(map(operator.mul, map(_get_quantity, rows), map(_get_unit_price, rows)))
+        amount_range = (min(amounts), max(amounts)) if amounts else None
+
+        if min_amount is not None:
+            count = len(rows)
+            rows, amounts = _keep(rows, amounts, list(map(operator.ge, amounts, repeat(min_amount))))
+            rejected["min_amount"] = count - len(rows)
+        if max_amount is not None:
+            count = len(rows)
+            rows, amounts = _keep(rows, amounts, list(map(operator.le, amounts, repeat(max_amount))))
+            rejected["max_amount"] = count - len(rows)
+
+        return rows, rejected, regions, total_input, amount_range
+
+    return validate
+
+
+_validate_rows = build_validator()
+
+
+def merge_summaries(into, summary):
+    """
+    Adds one validate_and_filter summary into another, e.g. across workers
+    or incremental runs
+    """
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            counts = into.setdefault(key, {})
+            for name, count in value.items():
+                counts[name] = counts.get(name, 0) + count
+        else:
+            into[key] = into.get(key, 0) + value
+    return into
+
+
+def _summarize(final_count, rejected, total_input, region, min_amount, max_amount):
+    """
+    Returns: (invalid_count, summary) for one validate_and_filter pass
+    """
+    invalid_count = sum(
+        count for name, count in rejected.items() if name not in FILTER_RULES
+    )
+    amount_filter = min_amount is not None or max_amount is not None
 
     summary = {
         "total_input": total_input,
         "invalid": invalid_count,
-        "filtered_by_region": len(filtered) if region else 0,
-        "filtered_by_amount": len(filtered) if min_amount or max_amount else 0,
-        "final_count": len(filtered)
+        "filtered_by_region": final_count if region else 0,
+        "filtered_by_amount": final_count if amount_filter else 0,
+        "final_count": final_count,
+        "rejected_by_rule": rejected
     }
+    return invalid_count, summary
 
-    return filtered, invalid_count, summary
 
-def calculate_total_revenue(transactions):
+def _validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Silent core of validate_and_filter
+    Returns: (filtered, invalid_count, summary, regions, amount_range)
+    """
+    filtered, rejected, regions, total_input, amount_range = _validate_rows(
+        transactions, region, min_amount, max_amount
+    )
+    invalid_count, summary = _summarize(
+        len(filtered), rejected, total_input, region, min_amount, max_amount
+    )
+    return filtered, invalid_count, summary, regions, amount_range
+
+
+# Parsed rows validated per chunk by validate_into_table
+VALIDATE_CHUNK_ROWS = 65536
+
+
+@profiled
+def validate_into_table(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Silent validate_and_filter over any iterable of Transaction records,
+    e.g. iter_transactions over a file. Rows are validated a chunk at a
+    time and the survivors go straight into the table's columns, so the
+    list of every parsed row is never built.
+
+    Returns: (TransactionTable, invalid_count, summary, regions, amount_range)
+    """
+    table = TransactionTable()
+    rejected = dict.fromkeys([name for name, _, _, _ in VALIDATION_RULES] + FILTER_RULES, 0)
+    regions = set()
+    total_input = 0
+    amount_range = None
+
+    rows = iter(transactions)
+    while True:
+        chunk = list(islice(rows, VALIDATE_CHUNK_ROWS))
+        if not chunk:
+            break
+        filtered, chunk_rejected, chunk_regions, chunk_total, chunk_range = _validate_rows(
+            chunk, region, min_amount, max_amount
+        )
+        table.extend(filtered)
+        for name, count in chunk_rejected.items():
+            rejected[name] += count
+        regions |= chunk_regions
+        total_input += chunk_total
+        if chunk_range:
+            amount_range = chunk_range if amount_range is None else (
+                min(amount_range[0], chunk_range[0]), max(amount_range[1], chunk_range[1])
+            )
+
+    invalid_count, summary = _summarize(
+        len(table), rejected, total_input, region, min_amount, max_amount
+    )
+    return table, invalid_count, summary, regions, amount_range
+
+
+@profiled
+def calculate_total_revenue(transactions, backend="python"):
     """
     Calculates total revenue from all transactions
     """
+    if backend == "numpy":
+        return _numpy_backend().calculate_total_revenue(transactions)
+
     total_revenue = 0.0
 
     for tx in transactions:
-        total_revenue += tx["Quantity"] * tx["UnitPrice"]
+        total_revenue += tx.Quantity * tx.UnitPrice
 
     return total_revenue
-def region_wise_sales(transactions):
+@profiled
+def region_wise_sales(transactions, backend="python"):
     """
     Analyzes sales by region
     """
+    if backend == "numpy":
+        return _numpy_backend().region_wise_sales(transactions)
+
     region_data = {}
     total_revenue = calculate_total_revenue(transactions)
 
     for tx in transactions:
-        region = tx["Region"]
-        revenue = tx["Quantity"] * tx["UnitPrice"]
+        region = tx.Region
+        revenue = tx.Quantity * tx.UnitPrice
 
         if region not in region_data:
             region_data[region] = {
@@ -154,16 +339,20 @@ def region_wise_sales(transactions):
     )
 
     return sorted_regions
-def top_selling_products(transactions, n=5):
+@profiled
+def top_selling_products(transactions, n=5, backend="python"):
     """
     Finds top n products by total quantity sold
     """
+    if backend == "numpy":
+        return _numpy_backend().top_selling_products(transactions, n)
+
     product_data = {}
 
     for tx in transactions:
-        product = tx["ProductName"]
-        quantity = tx["Quantity"]
-        revenue = quantity * tx["UnitPrice"]
+        product = tx.ProductName
+        quantity = tx.Quantity
+        revenue = quantity * tx.UnitPrice
 
         if product not in product_data:
             product_data[product] = {
@@ -180,20 +369,24 @@ def top_selling_products(transactions, n=5):
         for product, data in product_data.items()
     ]
 
-    # Sort by quantity descending
-    product_list.sort(key=lambda x: x[1], reverse=True)
-
-    return product_list[:n]
-def customer_analysis(transactions):
+    # Top n by quantity, descending, without sorting every product
+    return heapq.nlargest(n, product_list, key=lambda x: x[1])
+@profiled
+def customer_analysis(transactions, backend="python", top_n=None):
     """
     Analyzes customer purchase patterns
+    top_n: return only the top N customers by spend (heap selection)
     """
+    if backend == "numpy":
+        result = _numpy_backend().customer_analysis(transactions)
+        return dict(list(result.items())[:top_n]) if top_n else result
+
     customer_data = {}
 
     for tx in transactions:
-        customer = tx["CustomerID"]
-        revenue = tx["Quantity"] * tx["UnitPrice"]
-        product = tx["ProductName"]
+        customer = tx.CustomerID
+        revenue = tx.Quantity * tx.UnitPrice
+        product = tx.ProductName
 
         if customer not in customer_data:
             customer_data[customer] = {
@@ -220,21 +413,28 @@ def customer_analysis(transactions):
         }
 
     # Sort by total_spent descending
+    if top_n:
+        return dict(heapq.nlargest(top_n, result.items(), key=lambda x: x[1]["total_spent"]))
+
     sorted_result = dict(
         sorted(result.items(), key=lambda x: x[1]["total_spent"], reverse=True)
     )
 
     return sorted_result
-def daily_sales_trend(transactions):
+@profiled
+def daily_sales_trend(transactions, backend="python"):
     """
     Analyzes sales trends by date
     """
+    if backend == "numpy":
+        return _numpy_backend().daily_sales_trend(transactions)
+
     daily_data = {}
 
     for tx in transactions:
-        date = tx["Date"]
-        revenue = tx["Quantity"] * tx["UnitPrice"]
-        customer = tx["CustomerID"]
+        date = tx.Date
+        revenue = tx.Quantity * tx.UnitPrice
+        customer = tx.CustomerID
 
         if date not in daily_data:
             daily_data[date] = {
@@ -258,17 +458,20 @@ def daily_sales_trend(transactions):
         }
 
     return result
-def find_peak_sales_day(transactions):
+@profiled
+def find_peak_sales_day(transactions, backend="python"):
     """
     Identifies the date with highest revenue
     Returns: tuple (date, revenue, transaction_count)
     """
+    if backend == "numpy":
+        return _numpy_backend().find_peak_sales_day(transactions)
 
     daily_data = {}
 
     for t in transactions:
-        date = t['Date']
-        revenue = t['Quantity'] * t['UnitPrice']
+        date = t.Date
+        revenue = t.Quantity * t.UnitPrice
 
         if date not in daily_data:
             daily_data[date] = {'revenue': 0, 'count': 0}
@@ -287,18 +490,21 @@ def find_peak_sales_day(transactions):
             peak_count = data['count']
 
     return (peak_date, round(peak_revenue, 2), peak_count)
-def low_performing_products(transactions, threshold=10):
+@profiled
+def low_performing_products(transactions, threshold=10, backend="python"):
     """
     Identifies products with low sales
     Returns list of tuples (ProductName, TotalQuantity, TotalRevenue)
     """
+    if backend == "numpy":
+        return _numpy_backend().low_performing_products(transactions, threshold)
 
     product_data = {}
 
     for t in transactions:
-        product = t['ProductName']
-        qty = t['Quantity']
-        revenue = qty * t['UnitPrice']
+        product = t.ProductName
+        qty = t.Quantity
+        revenue = qty * t.UnitPrice
 
         if product not in product_data:
             product_data[product] = {'qty': 0, 'revenue': 0}
@@ -319,3 +525,417 @@ def low_performing_products(transactions, threshold=10):
 
     return low_products
 
+
+class SalesAggregator:
+    """
+    Accumulates every sales metric in a single pass over transactions.
+    Quantity * UnitPrice is computed once per row.
+
+    customer_capacity: when set, customers are tracked approximately in
+    bounded memory (Space-Saving for spend, Count-Min for order counts)
+    instead of one exact entry per CustomerID
+
+    distinct_limit: when set, unique customers per day and products bought
+    per customer are counted exactly up to this many keys, then by a
+    HyperLogLog of 2**precision registers (relative error
+    1.04 / sqrt(2**precision))
+
+    memory_budget: when set (in MB), exact per-customer totals beyond
+    roughly that much memory are hash-partitioned by CustomerID into spill
+    files and merged one partition at a time (see utils.spill); results
+    are the same as in memory
+    """
+
+    def __init__(self, customer_capacity=None, epsilon=0.001, delta=0.01,
+                 distinct_limit=None, precision=12, memory_budget=None):
+        self.customer_capacity = customer_capacity
+        self.distinct_limit = distinct_limit
+        self.precision = precision
+        self.memory_budget = memory_budget
+        if customer_capacity:
+            self.customer_spend = SpaceSaving(customer_capacity)
+            self.customer_orders = CountMinSketch(epsilon, delta)
+        # Only exact customer tracking spills
+        self.customer_spill = (
+            CustomerSpill.for_budget(memory_budget)
+            if memory_budget and not customer_capacity else None
+        )
+        self.total_revenue = 0.0
+        self.transaction_count = 0
+        self.first_date = None
+        self.last_date = None
+        # key -> [total, count] style accumulators, in first-seen order
+        self.regions = {}
+        self.products = {}
+        self.customers = {}
+        self.daily = {}
+
+    def _distinct(self, *keys):
+        if self.distinct_limit is None:
+            return set(keys)
+        return DistinctCounter(self.distinct_limit, self.precision, keys)
+
+    def _distinct_state(self, distinct):
+        if isinstance(distinct, set):
+            return sorted(distinct)
+        return distinct.to_state()
+
+    def _distinct_count_state(self, distinct):
+        # Exact counts keep only their size; a sketch keeps its registers
+        if isinstance(distinct, set):
+            return len(distinct)
+        if distinct.exact:
+            return distinct.count()
+        return distinct.to_state()
+
+    def _distinct_from_state(self, state):
+        if isinstance(state, int):
+            return state
+        if isinstance(state, list):
+            return self._distinct(*state)
+        return DistinctCounter.from_state(state, self.distinct_limit, self.precision)
+
+    def add(self, date, product, customer, region, quantity, revenue):
+        """
+        Folds one transaction into the running totals
+        """
+        self.total_revenue += revenue
+        self.transaction_count += 1
+
+        if self.first_date is None or date < self.first_date:
+            self.first_date = date
+        if self.last_date is None or date > self.last_date:
+            self.last_date = date
+
+        entry = self.regions.get(region)
+        if entry is None:
+            self.regions[region] = [revenue, 1]
+        else:
+            entry[0] += revenue
+            entry[1] += 1
+
+        entry = self.products.get(product)
+        if entry is None:
+            self.products[product] = [quantity, revenue]
+        else:
+            entry[0] += quantity
+            entry[1] += revenue
+
+        if self.customer_capacity:
+            self.customer_spend.add(customer, revenue)
+            self.customer_orders.add(customer)
+        elif self.customer_spill is not None:
+            self.customer_spill.add(
+                customer, revenue, product, self.transaction_count, self._distinct
+            )
+        else:
+            entry = self.customers.get(customer)
+            if entry is None:
+                self.customers[customer] = [revenue, 1, self._distinct(product)]
+            else:
+                entry[0] += revenue
+                entry[1] += 1
+                entry[2].add(product)
+
+        entry = self.daily.get(date)
+        if entry is None:
+            self.daily[date] = [revenue, 1, self._distinct(customer)]
+        else:
+            entry[0] += revenue
+            entry[1] += 1
+            entry[2].add(customer)
+
+    @profiled_method
+    def update(self, transactions):
+        """
+        Folds an iterable of transactions into the running totals
+        """
+        add = self.add
+
+        if isinstance(transactions, TransactionTable):
+            # Columnar fast path: no per-row dicts, revenue is precomputed
+            encoded = transactions.encoded
+            rows = zip(
+                encoded["Date"], encoded["ProductName"], encoded["CustomerID"],
+                encoded["Region"], transactions.quantity, transactions.revenue
+            )
+            for row in rows:
+                add(*row)
+            return self
+
+        for tx in transactions:
+            quantity = tx.Quantity
+            add(
+                tx.Date, tx.ProductName, tx.CustomerID, tx.Region,
+                quantity, quantity * tx.UnitPrice
+            )
+        return self
+
+    def merge(self, other):
+        """
+        Combines the totals of another aggregator into this one
+        """
+        if self.customer_spill is not None:
+            # other's rows follow this one's, for first-seen customer order
+            self.customer_spill.merge(other.customer_spill, self.transaction_count)
+
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+
+        for date in (other.first_date, other.last_date):
+            if date is None:
+                continue
+            if self.first_date is None or date < self.first_date:
+                self.first_date = date
+            if self.last_date is None or date > self.last_date:
+                self.last_date = date
+
+        for key, (total, count) in other.regions.items():
+            entry = self.regions.setdefault(key, [0.0, 0])
+            entry[0] += total
+            entry[1] += count
+
+        for key, (quantity, revenue) in other.products.items():
+            entry = self.products.setdefault(key, [0, 0.0])
+            entry[0] += quantity
+            entry[1] += revenue
+
+        for key, (spent, count, products) in other.customers.items():
+            entry = self.customers.setdefault(key, [0.0, 0, self._distinct()])
+            entry[0] += spent
+            entry[1] += count
+            entry[2].update(products)
+
+        if self.customer_capacity:
+            self.customer_spend.merge(other.customer_spend)
+            self.customer_orders.merge(other.customer_orders)
+
+        for key, (revenue, count, customers) in other.daily.items():
+            entry = self.daily.setdefault(key, [0.0, 0, self._distinct()])
+            entry[0] += revenue
+            entry[1] += count
+            entry[2].update(customers)
+
+        return self
+
+    def close(self):
+        """
+        Deletes any customer spill files; the aggregator must not be used after
+        """
+        if self.customer_spill is not None:
+            self.customer_spill.discard()
+
+    def to_state(self, render_only=False):
+        """
+        Returns the running totals as a JSON-serializable dictionary
+
+        render_only: store each day's unique customers as a count, which is
+        all the reports use; the restored aggregator can render results
+        but not be updated or merged
+        """
+        daily_state = self._distinct_count_state if render_only else self._distinct_state
+        return {
+            "total_revenue": self.total_revenue,
+            "transaction_count": self.transaction_count,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "regions": self.regions,
+            "products": self.products,
+            "customers": {
+                key: [spent, count, self._distinct_state(products)]
+                for key, (spent, count, products) in self.customers.items()
+            },
+            "daily": {
+                key: [revenue, count, daily_state(customers)]
+                for key, (revenue, count, customers) in self.daily.items()
+            },
+            "customer_capacity": self.customer_capacity,
+            "distinct_limit": self.distinct_limit,
+            "precision": self.precision,
+            "memory_budget": self.memory_budget,
+            "customer_spill": (
+                self.customer_spill.to_state(self._distinct_state)
+                if self.customer_spill is not None else None
+            ),
+            "customer_spend": self.customer_spend.to_state() if self.customer_capacity else None,
+            "customer_orders": self.customer_orders.to_state() if self.customer_capacity else None
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuilds an aggregator saved with to_state()
+        """
+        aggregator = cls(
+            customer_capacity=state.get("customer_capacity"),
+            distinct_limit=state.get("distinct_limit"),
+            precision=state.get("precision", 12)
+        )
+        if state.get("customer_spill"):
+            aggregator.memory_budget = state["memory_budget"]
+            aggregator.customer_spill = CustomerSpill.from_state(
+                state["customer_spill"], aggregator._distinct_from_state
+            )
+        if aggregator.customer_capacity:
+            aggregator.customer_spend = SpaceSaving.from_state(state["customer_spend"])
+            aggregator.customer_orders = CountMinSketch.from_state(state["customer_orders"])
+        aggregator.total_revenue = state["total_revenue"]
+        aggregator.transaction_count = state["transaction_count"]
+        aggregator.first_date = state["first_date"]
+        aggregator.last_date = state["last_date"]
+        aggregator.regions = {key: list(value) for key, value in state["regions"].items()}
+        aggregator.products = {key: list(value) for key, value in state["products"].items()}
+        aggregator.customers = {
+            key: [spent, count, aggregator._distinct_from_state(products)]
+            for key, (spent, count, products) in state["customers"].items()
+        }
+        aggregator.daily = {
+            key: [revenue, count, aggregator._distinct_from_state(customers)]
+            for key, (revenue, count, customers) in state["daily"].items()
+        }
+        return aggregator
+
+    @profiled_method
+    def result(self, n=5, threshold=10, top_customers=None):
+        """
+        Builds the same structures the individual analysis functions return
+        top_customers: keep only the top N customers (heap selection instead
+        of sorting every customer)
+
+        Returns: dict with keys total_revenue, total_transactions,
+        avg_order_value, date_range, region_sales, top_products, customers,
+        customers_error, daily_trend, peak_day, low_products, distinct_error
+        (relative error of any HyperLogLog count, None when all are exact),
+        plus the weekly_trend, monthly_trend, best_window and quarter_to_date
+        rollups of the daily trend
+        """
+        total_revenue = self.total_revenue
+        count = self.transaction_count
+
+        region_data = {}
+        for region, (total, region_count) in self.regions.items():
+            region_data[region] = {
+                "total_sales": total,
+                "transaction_count": region_count,
+                "percentage": round((total / total_revenue) * 100, 2)
+            }
+        region_sales = dict(
+            sorted(region_data.items(), key=lambda x: x[1]["total_sales"], reverse=True)
+        )
+
+        product_list = [
+            (product, quantity, revenue)
+            for product, (quantity, revenue) in self.products.items()
+        ]
+        top_products = heapq.nlargest(n, product_list, key=lambda x: x[1])
+
+        low_products = [
+            (product, quantity, round(revenue, 2))
+            for product, quantity, revenue in product_list
+            if quantity < threshold
+        ]
+        low_products.sort(key=lambda x: x[1])
+
+        customers = {}
+        customers_error = None
+        approximate_distinct = False
+        if self.customer_capacity:
+            # Approximate: estimates may overstate spend by up to customers_error
+            for customer, spent, _ in self.customer_spend.top(top_customers or n):
+                purchases = max(1, int(self.customer_orders.estimate(customer)))
+                customers[customer] = {
+                    "total_spent": round(spent, 2),
+                    "purchase_count": purchases,
+                    "avg_order_value": round(spent / purchases, 2),
+                    "products_bought": []
+                }
+            customers_error = round(self.customer_spend.error_bound(), 2)
+        else:
+            if self.customer_spill is not None:
+                # Ranked one spill partition at a time, same order as below
+                by_spend = self.customer_spill.ranked(top_customers)
+            elif top_customers:
+                by_spend = heapq.nlargest(
+                    top_customers, self.customers.items(), key=lambda x: round(x[1][0], 2)
+                )
+            else:
+                by_spend = sorted(
+                    self.customers.items(), key=lambda x: round(x[1][0], 2), reverse=True
+                )
+            for customer, (spent, purchases, products) in by_spend:
+                if not isinstance(products, set):
+                    if products.exact:
+                        products = products.keys
+                    else:
+                        # Only the count survives in a sketch
+                        approximate_distinct = True
+                        products = []
+                customers[customer] = {
+                    "total_spent": round(spent, 2),
+                    "purchase_count": purchases,
+                    "avg_order_value": round(spent / purchases, 2),
+                    "products_bought": list(products)
+                }
+
+        daily_trend = {}
+        for date in sorted(self.daily.keys()):
+            revenue, day_count, day_customers = self.daily[date]
+            if isinstance(day_customers, set):
+                unique_customers = len(day_customers)
+            elif isinstance(day_customers, int):
+                # Saved with to_state(render_only=True)
+                unique_customers = day_customers
+            else:
+                unique_customers = day_customers.count()
+                approximate_distinct = approximate_distinct or not day_customers.exact
+            daily_trend[date] = {
+                "revenue": round(revenue, 2),
+                "transaction_count": day_count,
+                "unique_customers": unique_customers
+            }
+
+        peak_date = None
+        peak_revenue = 0
+        peak_count = 0
+        for date, (revenue, day_count, _) in self.daily.items():
+            if revenue > peak_revenue:
+                peak_revenue = revenue
+                peak_date = date
+                peak_count = day_count
+
+        if self.first_date is not None:
+            date_range = f"{self.first_date} to {self.last_date}"
+        else:
+            date_range = "N/A"
+
+        return {
+            "total_revenue": total_revenue,
+            "total_transactions": count,
+            "avg_order_value": total_revenue / count if count else 0,
+            "date_range": date_range,
+            "region_sales": region_sales,
+            "top_products": top_products,
+            "customers": customers,
+            "customers_error": customers_error,
+            "daily_trend": daily_trend,
+            "peak_day": (peak_date, round(peak_revenue, 2), peak_count),
+            "low_products": low_products,
+            "distinct_error": (
+                round(HyperLogLog.relative_error(self.precision), 4)
+                if approximate_distinct else None
+            ),
+            **trend_rollups(daily_trend)
+        }
+
+
+@profiled
+def analyze_sales(transactions, n=5, threshold=10, backend="python"):
+    """
+    Computes every sales metric in a single scan of the transactions
+    backend: "python" (default) or "numpy" for vectorized group-bys
+    Returns: dict (see SalesAggregator.result)
+    """
+    if backend == "numpy":
+        return _numpy_backend().analyze_sales(transactions, n, threshold)
+
+    return SalesAggregator().update(transactions).result(n, threshold)
@@ -1,32 +1,252 @@
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Tried in order for every line that is not valid UTF-8
+ENCODINGS = ["utf-8", "cp1252", "latin-1"]
+SAMPLE_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+DECODE_WINDOW = 64 * 1024
+
+# File suffix -> opener returning a binary stream of the decompressed data
+COMPRESSED_SUFFIXES = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".zst": None,  # zstandard, optional
+}
+
+
+def decode_line(raw_line, encodings=ENCODINGS):
+    """
+    Decodes one line with the first encoding that accepts it, so a stray
+    cp1252/latin-1 row never changes how the UTF-8 rows around it decode
+    (latin-1, last, accepts any bytes)
+    """
+    for encoding in encodings[:-1]:
+        try:
+            return raw_line.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw_line.decode(encodings[-1])
+
+
+def decode_chunk(chunk, window=DECODE_WINDOW):
+    """
+    Decodes a chunk of whole lines as UTF-8, one call per newline-aligned
+    window; only a line that is not valid UTF-8 goes through decode_line,
+    which gives the same text as decoding every line on its own.
+    (Windows keep each UnicodeDecodeError, which copies the rest of its
+    input, small.)
+    """
+    view = memoryview(chunk)
+    size = len(chunk)
+    parts = []
+    start = 0
+    while start < size:
+        end = chunk.find(b"\n", start + window) + 1 or size
+        try:
+            parts.append(str(view[start:end], "utf-8"))
+            start = end
+        except UnicodeDecodeError as e:
+            bad = start + e.start
+            line_start = chunk.rfind(b"\n", start, bad) + 1 or start
+            line_end = chunk.find(b"\n", bad) + 1 or size
+            parts.append(str(view[start:line_start], "utf-8"))
+            parts.append(decode_line(chunk[line_start:line_end]))
+            start = line_end
+    return "".join(parts)
+
+
+def iter_chunk_lines(file, end=None, chunk_size=CHUNK_SIZE, stats=None):
+    """
+    Reads newline-aligned chunks from the file's current position, up to
+    and including the line that crosses byte offset `end` (the end of the
+    file by default), decoding each chunk with decode_chunk
+
+    Yields: stripped lines, empty lines removed
+    """
+    position = file.tell() if end is not None else 0
+    while end is None or position < end:
+        chunk = file.read(chunk_size if end is None else min(chunk_size, end - position))
+        if not chunk:
+            break
+        if not chunk.endswith(b"\n"):
+            chunk += file.readline()
+        position += len(chunk)
+
+        lines = list(filter(None, map(str.strip, decode_chunk(chunk).split("\n"))))
+        if stats is not None:
+            stats["lines"] += len(lines)
+        yield from lines
+
+
+def is_compressed(filename):
+    return os.path.splitext(filename)[1].lower() in COMPRESSED_SUFFIXES
+
+
+def open_sales_file(filename, chunk_size=CHUNK_SIZE):
+    """
+    Opens a sales file for binary reading, decompressing .gz, .bz2, .xz and
+    .zst files on the fly
+
+    Returns: buffered binary stream (supports peek)
+    """
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in COMPRESSED_SUFFIXES:
+        return open(filename, "rb", buffering=chunk_size)
+
+    if suffix == ".zst":
+        if zstandard is None:
+            raise ImportError(f"Reading {filename} requires zstandard (pip install zstandard)")
+        raw = open(filename, "rb")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = COMPRESSED_SUFFIXES[suffix](filename, "rb")
+    return io.BufferedReader(stream, buffer_size=chunk_size)
+
+
+def expand_partitions(source):
+    """
+    Resolves a data source to its partition files: a single file, every
+    file in a directory, or every file matching a glob pattern
+
+    Returns: sorted list of file paths
+    """
+    if os.path.isdir(source):
+        return sorted(
+            entry.path for entry in os.scandir(source)
+            if entry.is_file() and not entry.name.startswith(".")
+        )
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+    return [source]
+
+
+def iter_file_lines(filename, chunk_size=CHUNK_SIZE, stats=None):
+    """
+    Streams the lines of one (possibly compressed) file; unlike
+    iter_sales_data the name is never expanded as a glob or directory
+
+    Yields: raw lines (strings), header and empty lines removed
+    """
+    try:
+        file = open_sales_file(filename, chunk_size)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    with file:
+        if stats is not None:
+            stats.setdefault("lines", 0)
+
+        file.readline()  # skip header
+        yield from iter_chunk_lines(file, chunk_size=chunk_size, stats=stats)
+
+
+def iter_sales_data(filename, chunk_size=CHUNK_SIZE, stats=None):
+    """
+    Streams sales data lines without loading them into memory.
+    `filename` may be a (possibly compressed) file, a directory or a glob
+    of partitions, each with its own header. Every line is decoded on its
+    own when its chunk is not valid UTF-8 (see iter_chunk_lines).
+
+    stats: optional dict, receives a running "lines" count
+
+    Yields: raw lines (strings), header and empty lines removed
+    """
+    partitions = expand_partitions(filename)
+    if not partitions:
+        print(f"Error: No files match '{filename}'.")
+        return
+
+    if stats is not None:
+        stats["lines"] = 0
+    for partition in partitions:
+        yield from iter_file_lines(partition, chunk_size, stats)
+
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
 
     Returns: list of raw lines (strings)
     """
-    encodings = ["utf-8", "latin-1", "cp1252"]
+    return list(iter_sales_data(filename))
 
-    for encoding in encodings:
-        try:
-            with open(filename, "r", encoding=encoding) as file:
-                lines = file.readlines()
 
-            # Remove header and empty lines
-            cleaned_lines = []
-            for line in lines[1:]:  # skip header
-                line = line.strip()
-                if line:
-                    cleaned_lines.append(line)
+def split_byte_ranges(filename, parts):
+    """
+    Splits the data section of a file (after the header) into newline-aligned
+    byte ranges, so every line belongs to exactly one range
 
-            return cleaned_lines
+    Returns: list of (start, end) tuples
+    """
+    with open(filename, "rb") as file:
+        file.readline()  # skip header
+        data_start = file.tell()
+        size = file.seek(0, 2)
 
-        except UnicodeDecodeError:
-            continue
+        boundaries = [data_start]
+        for i in range(1, parts):
+            position = data_start + (size - data_start) * i // parts
+            if position <= boundaries[-1]:
+                continue
+            file.seek(position - 1)
+            file.readline()  # move to the start of the next line
+            boundary = file.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+        boundaries.append(size)
 
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
+    return list(zip(boundaries, boundaries[1:]))
 
-    print("Error: Unable to read file with supported encodings.")
-    return []
 
+def iter_byte_range(filename, start, end, stats=None):
+    """
+    Streams the lines that start inside [start, end) of a file
+
+    Yields: raw lines (strings), empty lines removed
+    """
+    if stats is not None:
+        stats["lines"] = 0
+
+    with open(filename, "rb", buffering=CHUNK_SIZE) as file:
+        file.seek(start)
+        yield from iter_chunk_lines(file, end, stats=stats)
+
+
+def data_start(filename):
+    """
+    Returns the byte offset of the first line after the header
+    """
+    with open(filename, "rb") as file:
+        file.readline()
+        return file.tell()
+
+
+def complete_lines_end(filename, block_size=SAMPLE_SIZE):
+    """
+    Returns the byte offset just past the last newline, so a line that is
+    still being appended is left for the next run
+    """
+    with open(filename, "rb") as file:
+        end = file.seek(0, 2)
+        while end > 0:
+            start = max(0, end - block_size)
+            file.seek(start)
+            block = file.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return start + newline + 1
+            end = start
+    return 0
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+
+from utils.file_handler import iter_byte_range, data_start, complete_lines_end, SAMPLE_SIZE
+from utils.data_processor import (
+    iter_transactions, validate_into_table, merge_summaries, SalesAggregator
+)
+from utils.transaction_table import TransactionTable
+
+
+STATE_FILE = "output/aggregate_state.json"
+FINGERPRINT_WINDOW = SAMPLE_SIZE
+
+
+def fingerprint(filename, offset):
+    """
+    Fingerprints the first `offset` bytes of a file from its first and last
+    FINGERPRINT_WINDOW bytes, enough to notice a rewritten or rotated file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        digest.update(file.read(min(offset, FINGERPRINT_WINDOW)))
+        tail_start = max(0, offset - FINGERPRINT_WINDOW)
+        file.seek(tail_start)
+        digest.update(file.read(offset - tail_start))
+    return digest.hexdigest()
+
+
+def new_checkpoint(filename, aggregator_options=None):
+    """
+    Returns an empty checkpoint positioned after the header of `filename`
+    """
+    return {
+        "source": os.path.abspath(filename),
+        "offset": data_start(filename),
+        "fingerprint": None,
+        "lines": 0,
+        "malformed": 0,
+        "invalid": 0,
+        "summary": {
+            "total_input": 0,
+            "invalid": 0,
+            "filtered_by_region": 0,
+            "filtered_by_amount": 0,
+            "final_count": 0
+        },
+        "enrichment": {"total": 0, "matched": 0, "failed_products": {}},
+        # Enriched output file and its size once this checkpoint's rows were written
+        "enriched_output": None,
+        "enriched_offset": 0,
+        "aggregator": SalesAggregator(**(aggregator_options or {}))
+    }
+
+
+def load_checkpoint(filename, state_file=STATE_FILE):
+    """
+    Loads the saved checkpoint for `filename` if it still describes a prefix
+    of the file; otherwise returns None and the caller starts over
+    """
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if checkpoint.get("source") != os.path.abspath(filename):
+        return None
+    if "failed_products" not in checkpoint["enrichment"]:
+        # Written before failed rows were counted per product
+        return None
+    if os.path.getsize(filename) < checkpoint["offset"]:
+        return None
+    if checkpoint["fingerprint"] != fingerprint(filename, checkpoint["offset"]):
+        return None
+
+    # Written before malformed rows were counted
+    checkpoint.setdefault("malformed", 0)
+    checkpoint["aggregator"] = SalesAggregator.from_state(checkpoint["aggregator"])
+    return checkpoint
+
+
+def save_checkpoint(checkpoint, state_file=STATE_FILE):
+    """
+    Writes the checkpoint atomically next to the other output files
+    """
+    state = dict(checkpoint)
+    state["aggregator"] = checkpoint["aggregator"].to_state()
+
+    temp_file = state_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, state_file)
+
+
+def resume_output(checkpoint, filename):
+    """
+    Cuts the enriched output back to the size recorded in the checkpoint,
+    dropping rows appended by a run that stopped before saving it
+
+    Returns: False when the file no longer holds what the checkpoint
+    recorded (another file, missing or shorter), so it cannot be resumed
+    """
+    if checkpoint.get("enriched_output") != os.path.abspath(filename):
+        return False
+    offset = checkpoint["enriched_offset"]
+    try:
+        size = os.path.getsize(filename)
+    except FileNotFoundError:
+        return False
+    if size < offset:
+        return False
+    if size > offset:
+        os.truncate(filename, offset)
+    return True
+
+
+def record_output(checkpoint, filename):
+    """
+    Records the enriched output's current size, to resume at next run
+    """
+    checkpoint["enriched_output"] = os.path.abspath(filename)
+    checkpoint["enriched_offset"] = os.path.getsize(filename)
+
+
+def fold_new_rows(filename, checkpoint):
+    """
+    Reads only the complete lines appended since the checkpoint, validates
+    them and folds them into the checkpointed aggregates
+
+    Returns: TransactionTable of the new valid transactions
+    """
+    start = checkpoint["offset"]
+    end = complete_lines_end(filename)
+    if end <= start:
+        return TransactionTable()
+
+    stats = {}
+    rejects = []
+    table, invalid_count, summary, _, _ = validate_into_table(
+        iter_transactions(iter_byte_range(filename, start, end, stats=stats), rejects)
+    )
+
+    checkpoint["aggregator"].update(table)
+    checkpoint["lines"] += stats["lines"]
+    checkpoint["malformed"] += len(rejects)
+    checkpoint["invalid"] += invalid_count
+    merge_summaries(checkpoint["summary"], summary)
+
+    checkpoint["offset"] = end
+    checkpoint["fingerprint"] = fingerprint(filename, end)
+    return table
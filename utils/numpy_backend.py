@@ -0,0 +1,277 @@
+# NumPy-vectorized versions of the data_processor analytics.
+# Key columns are factorized into integer codes and every metric is a
+# bincount/argsort grouped reduction. Groups are ordered by first appearance
+# and sorts are stable, so results match the pure Python functions.
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.rollups import trend_rollups
+from utils.transaction_table import TransactionTable
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The numpy backend requires numpy (pip install numpy)")
+
+
+class _Column:
+    """
+    Factorized key column: integer codes per row plus the value list
+    """
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+        # Groups actually present, ordered by first appearance
+        present, first = np.unique(codes, return_index=True)
+        self.groups = present[np.argsort(first, kind="stable")]
+
+
+def _factorize(values):
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(v, len(lookup)) for v in values),
+        dtype=np.int64
+    )
+    return _Column(codes, list(lookup))
+
+
+class _Frame:
+    """
+    Column arrays for one set of transactions, factorized lazily
+    """
+
+    def __init__(self, transactions):
+        _require_numpy()
+        self._columns = {}
+
+        if isinstance(transactions, TransactionTable):
+            self._table = transactions
+            self.quantity = np.frombuffer(transactions.quantity, dtype=np.int64)
+            self.revenue = np.frombuffer(transactions.revenue, dtype=np.float64)
+        else:
+            self._table = None
+            self._rows = transactions if isinstance(transactions, list) else list(transactions)
+            self.quantity = np.fromiter(
+                (tx.Quantity for tx in self._rows), dtype=np.int64
+            )
+            unit_price = np.fromiter(
+                (tx.UnitPrice for tx in self._rows), dtype=np.float64
+            )
+            self.revenue = self.quantity * unit_price
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def key(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            if self._table is not None:
+                encoded = self._table.encoded[name]
+                codes = np.frombuffer(encoded.codes, dtype=np.uint32).astype(np.int64)
+                column = _Column(codes, encoded.values)
+            else:
+                column = _factorize(map(attrgetter(name), self._rows))
+            self._columns[name] = column
+        return column
+
+    def sums(self, column, weights=None):
+        size = len(column.values)
+        if weights is None:
+            return np.bincount(column.codes, minlength=size)
+        # bincount adds in row order, the same order as the Python loops
+        return np.bincount(column.codes, weights=weights, minlength=size)
+
+    def distinct_counts(self, column, other):
+        """
+        Number of distinct `other` values per group of `column`
+        """
+        width = len(other.values)
+        pairs = column.codes * width + other.codes
+        size = len(column.values) * width
+        if size <= 8 * len(pairs) + (1 << 20):
+            # Dense bitmap of seen pairs avoids sorting
+            seen = np.zeros(size, dtype=bool)
+            seen[pairs] = True
+            return seen.reshape(len(column.values), width).sum(axis=1)
+        pairs = np.unique(pairs)
+        return np.bincount(pairs // width, minlength=len(column.values))
+
+
+def _total(frame):
+    if not len(frame):
+        return 0.0
+    return float(np.cumsum(frame.revenue)[-1])
+
+
+def calculate_total_revenue(transactions):
+    return _total(_Frame(transactions))
+
+
+def _region_wise_sales(frame, total_revenue):
+    regions = frame.key("Region")
+    totals = frame.sums(regions, frame.revenue)
+    counts = frame.sums(regions)
+
+    order = regions.groups[np.argsort(-totals[regions.groups], kind="stable")]
+    result = {}
+    for g in order.tolist():
+        total = float(totals[g])
+        result[regions.values[g]] = {
+            "total_sales": total,
+            "transaction_count": int(counts[g]),
+            "percentage": round((total / total_revenue) * 100, 2)
+        }
+    return result
+
+
+def region_wise_sales(transactions):
+    frame = _Frame(transactions)
+    return _region_wise_sales(frame, _total(frame))
+
+
+def _product_totals(frame):
+    products = frame.key("ProductName")
+    quantities = frame.sums(products, frame.quantity).astype(np.int64)
+    revenues = frame.sums(products, frame.revenue)
+    return products, quantities, revenues
+
+
+def _top_selling_products(frame, n):
+    products, quantities, revenues = _product_totals(frame)
+    groups = products.groups
+    order = groups[np.argsort(-quantities[groups], kind="stable")][:n]
+    return [
+        (products.values[g], int(quantities[g]), float(revenues[g]))
+        for g in order.tolist()
+    ]
+
+
+def top_selling_products(transactions, n=5):
+    return _top_selling_products(_Frame(transactions), n)
+
+
+def _customer_analysis(frame):
+    customers = frame.key("CustomerID")
+    products = frame.key("ProductName")
+    spent = frame.sums(customers, frame.revenue)
+    counts = frame.sums(customers)
+
+    # Distinct (customer, product) pairs in first-seen order
+    width = len(products.values)
+    pairs, first = np.unique(customers.codes * width + products.codes, return_index=True)
+    pairs = pairs[np.argsort(first, kind="stable")]
+    bought = {}
+    for pair in pairs.tolist():
+        bought.setdefault(pair // width, []).append(products.values[pair % width])
+
+    result = {}
+    for g in customers.groups.tolist():
+        total = float(spent[g])
+        count = int(counts[g])
+        result[customers.values[g]] = {
+            "total_spent": round(total, 2),
+            "purchase_count": count,
+            "avg_order_value": round(total / count, 2),
+            "products_bought": bought[g]
+        }
+
+    return dict(
+        sorted(result.items(), key=lambda x: x[1]["total_spent"], reverse=True)
+    )
+
+
+def customer_analysis(transactions):
+    return _customer_analysis(_Frame(transactions))
+
+
+def _daily_totals(frame):
+    dates = frame.key("Date")
+    return dates, frame.sums(dates, frame.revenue), frame.sums(dates)
+
+
+def _daily_sales_trend(frame):
+    dates, revenues, counts = _daily_totals(frame)
+    customers = frame.distinct_counts(dates, frame.key("CustomerID"))
+
+    result = {}
+    for g in sorted(dates.groups.tolist(), key=dates.values.__getitem__):
+        result[dates.values[g]] = {
+            "revenue": round(float(revenues[g]), 2),
+            "transaction_count": int(counts[g]),
+            "unique_customers": int(customers[g])
+        }
+    return result
+
+
+def daily_sales_trend(transactions):
+    return _daily_sales_trend(_Frame(transactions))
+
+
+def _find_peak_sales_day(frame):
+    dates, revenues, counts = _daily_totals(frame)
+    groups = dates.groups
+    if not len(groups):
+        return (None, 0, 0)
+
+    # argmax picks the first maximum, like the strict > in the Python loop
+    g = int(groups[np.argmax(revenues[groups])])
+    if not revenues[g] > 0:
+        return (None, 0, 0)
+    return (dates.values[g], round(float(revenues[g]), 2), int(counts[g]))
+
+
+def find_peak_sales_day(transactions):
+    return _find_peak_sales_day(_Frame(transactions))
+
+
+def _low_performing_products(frame, threshold):
+    products, quantities, revenues = _product_totals(frame)
+    groups = products.groups
+    groups = groups[quantities[groups] < threshold]
+    order = groups[np.argsort(quantities[groups], kind="stable")]
+    return [
+        (products.values[g], int(quantities[g]), round(float(revenues[g]), 2))
+        for g in order.tolist()
+    ]
+
+
+def low_performing_products(transactions, threshold=10):
+    return _low_performing_products(_Frame(transactions), threshold)
+
+
+def analyze_sales(transactions, n=5, threshold=10):
+    """
+    Vectorized equivalent of data_processor.analyze_sales
+    """
+    frame = _Frame(transactions)
+    total_revenue = _total(frame)
+    count = len(frame)
+
+    if count:
+        dates = frame.key("Date")
+        present = sorted(dates.values[g] for g in dates.groups.tolist())
+        date_range = f"{present[0]} to {present[-1]}"
+    else:
+        date_range = "N/A"
+
+    daily_trend = _daily_sales_trend(frame)
+    return {
+        "total_revenue": total_revenue,
+        "total_transactions": count,
+        "avg_order_value": total_revenue / count if count else 0,
+        "date_range": date_range,
+        "region_sales": _region_wise_sales(frame, total_revenue),
+        "top_products": _top_selling_products(frame, n),
+        "customers": _customer_analysis(frame),
+        "customers_error": None,
+        "daily_trend": daily_trend,
+        "peak_day": _find_peak_sales_day(frame),
+        "low_products": _low_performing_products(frame, threshold),
+        "distinct_error": None,
+        **trend_rollups(daily_trend)
+    }
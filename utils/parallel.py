@@ -0,0 +1,188 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.file_handler import split_byte_ranges, iter_byte_range, iter_file_lines
+from utils.data_processor import (
+    iter_transactions, validate_into_table, merge_summaries, SalesAggregator
+)
+from utils.transaction_table import TransactionTable
+
+
+def _process_lines(lines, stats, region, min_amount, max_amount, aggregator_options):
+    """
+    Parses, validates and aggregates a stream of lines inside a worker
+
+    Returns: dict partial result, merged by merge_partials; "malformed"
+    counts the rows the parser rejected
+    """
+    rejects = []
+    table, invalid_count, summary, regions, amount_range = validate_into_table(
+        iter_transactions(lines, rejects), region, min_amount, max_amount
+    )
+
+    return {
+        "lines": stats.get("lines", 0),
+        "malformed": len(rejects),
+        "table": table,
+        "invalid": invalid_count,
+        "summary": summary,
+        "regions": regions,
+        "amount_range": amount_range,
+        "aggregator": SalesAggregator(**(aggregator_options or {})).update(table)
+    }
+
+
+def _process_range(filename, start, end, region, min_amount, max_amount,
+                   aggregator_options=None):
+    """
+    Worker: parses, validates and aggregates one byte range of the file
+
+    Returns: dict partial result (see _process_lines)
+    """
+    stats = {}
+    lines = iter_byte_range(filename, start, end, stats=stats)
+    return _process_lines(lines, stats, region, min_amount, max_amount, aggregator_options)
+
+
+def _process_partition(filename, region, min_amount, max_amount, aggregator_options=None):
+    """
+    Worker: decompresses, parses, validates and aggregates one partition file
+
+    Returns: dict partial result (see _process_lines) plus its file name
+    """
+    stats = {}
+    lines = iter_file_lines(filename, stats=stats)
+    partial = _process_lines(lines, stats, region, min_amount, max_amount, aggregator_options)
+    partial["file"] = filename
+    return partial
+
+
+def _worker_options(aggregator_options, workers):
+    """
+    Worker aggregators run at the same time, so each gets an equal share
+    of any memory budget
+    Returns: aggregator options for one worker
+    """
+    options = dict(aggregator_options or {})
+    if options.get("memory_budget"):
+        options["memory_budget"] = options["memory_budget"] / workers
+    return options
+
+
+def merge_partials(partials, aggregator_options=None):
+    """
+    Combines worker partials in file order
+
+    Returns: dict with the same keys as a single partial, plus
+    "partitions": per-partition lines/valid/invalid/summary when the
+    partials came from partition files
+    """
+    merged = {
+        "lines": 0,
+        "malformed": 0,
+        "table": TransactionTable(),
+        "invalid": 0,
+        "summary": {
+            "total_input": 0,
+            "invalid": 0,
+            "filtered_by_region": 0,
+            "filtered_by_amount": 0,
+            "final_count": 0
+        },
+        "regions": set(),
+        "amount_range": None,
+        "aggregator": SalesAggregator(**(aggregator_options or {})),
+        "partitions": []
+    }
+
+    for partial in partials:
+        if "file" in partial:
+            merged["partitions"].append({
+                "file": partial["file"],
+                "lines": partial["lines"],
+                "malformed": partial["malformed"],
+                "valid": len(partial["table"]),
+                "invalid": partial["invalid"],
+                "summary": partial["summary"]
+            })
+        merged["lines"] += partial["lines"]
+        merged["malformed"] += partial["malformed"]
+        merged["table"].extend(partial["table"])
+        merged["invalid"] += partial["invalid"]
+        merge_summaries(merged["summary"], partial["summary"])
+        merged["regions"] |= partial["regions"]
+        merged["aggregator"].merge(partial["aggregator"])
+
+        low_high = partial["amount_range"]
+        if low_high:
+            current = merged["amount_range"]
+            if current is None:
+                merged["amount_range"] = low_high
+            else:
+                merged["amount_range"] = (
+                    min(current[0], low_high[0]), max(current[1], low_high[1])
+                )
+
+    return merged
+
+
+def _run_workers(worker, tasks, filters, workers, aggregator_options):
+    """
+    Runs worker(*task, *filters, options) for every task across a process
+    pool, merges the partials in task order and prints the same summary
+    as validate_and_filter
+
+    Returns: merged dict (see merge_partials)
+    """
+    options = _worker_options(aggregator_options, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker, *task, *filters, options) for task in tasks]
+        partials = [future.result() for future in futures]
+
+    merged = merge_partials(partials, aggregator_options)
+
+    print("Available Regions:", merged["regions"])
+    if merged["amount_range"]:
+        low, high = merged["amount_range"]
+        print("Transaction Amount Range:", low, "-", high)
+
+    return merged
+
+
+def process_in_parallel(filename, region=None, min_amount=None, max_amount=None, workers=None,
+                        aggregator_options=None):
+    """
+    Reads, parses, validates and aggregates a sales file across a process
+    pool, one newline-aligned byte range per worker
+    aggregator_options: keyword arguments for every SalesAggregator (a
+    memory budget is shared between the workers)
+
+    Returns: dict with keys lines, malformed, table (validated TransactionTable),
+    invalid, summary, regions, amount_range, aggregator (merged SalesAggregator)
+    """
+    workers = workers or os.cpu_count() or 1
+    try:
+        ranges = split_byte_ranges(filename, workers)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return merge_partials([], aggregator_options)
+
+    tasks = [(filename, start, end) for start, end in ranges]
+    return _run_workers(
+        _process_range, tasks, (region, min_amount, max_amount), workers, aggregator_options
+    )
+
+
+def process_partitions(files, region=None, min_amount=None, max_amount=None, workers=None,
+                       aggregator_options=None):
+    """
+    Decodes, parses, validates and aggregates partition files (compressed
+    or not) across a process pool, one file per task, merged in file order
+
+    Returns: dict as process_in_parallel, plus "partitions"
+    """
+    workers = min(workers or os.cpu_count() or 1, max(1, len(files)))
+    tasks = [(filename,) for filename in files]
+    return _run_workers(
+        _process_partition, tasks, (region, min_amount, max_amount), workers, aggregator_options
+    )
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from utils.data_processor import VALIDATION_RULES
+from utils.incremental import fingerprint
+from utils.transaction_table import TransactionTable, ENCODED_COLUMNS
+
+
+CACHE_FILE = "output/parsed_cache.bin"
+MAGIC = b"SALESTB1"
+# Column buffers start on 8-byte boundaries so they can be cast in place
+ALIGNMENT = 8
+
+
+def source_key(filename):
+    """
+    Identifies the parsed contents of `filename`: path, size, mtime, a
+    content fingerprint and the validation rules the rows passed
+
+    Returns: dict, compared as a whole against the cached key
+    """
+    stat = os.stat(filename)
+    rules = hashlib.sha256(repr(VALIDATION_RULES).encode("utf-8")).hexdigest()
+    return {
+        "source": os.path.abspath(filename),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content": fingerprint(filename, stat.st_size),
+        "rules": rules,
+        "byteorder": sys.byteorder
+    }
+
+
+def _table_columns(table):
+    """
+    Returns: list of (name, typecode, buffer) for every array in the table
+    """
+    columns = [
+        ("TransactionID.data", "B", table.transaction_ids.data),
+        ("TransactionID.offsets", "Q", table.transaction_ids.offsets),
+        ("Quantity", "q", table.quantity),
+        ("UnitPrice", "d", table.unit_price),
+        ("Revenue", "d", table.revenue)
+    ]
+    for name in ENCODED_COLUMNS:
+        columns.append((name, "I", table.encoded[name].codes))
+    return columns
+
+
+def write_table(table, filename, header):
+    """
+    Writes a TransactionTable as one memory-mappable columnar file:
+    MAGIC, header length, JSON header (the given dict plus the column
+    layout and dictionary values), then the raw column arrays
+    """
+    layout = []
+    offset = 0
+    for name, typecode, values in _table_columns(table):
+        size = memoryview(values).nbytes
+        layout.append({"name": name, "typecode": typecode, "offset": offset, "size": size})
+        offset += size + (-size % ALIGNMENT)
+
+    header = json.dumps({
+        **header,
+        "rows": len(table),
+        "columns": layout,
+        "values": {name: table.encoded[name].values for name in ENCODED_COLUMNS}
+    }).encode("utf-8")
+    prefix = len(MAGIC) + 8 + len(header)
+    header += b" " * (-prefix % ALIGNMENT)
+
+    temp_file = filename + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for (_, _, values), column in zip(_table_columns(table), layout):
+            f.write(memoryview(values).cast("B"))
+            f.write(b"\0" * (-column["size"] % ALIGNMENT))
+    os.replace(temp_file, filename)
+
+
+def read_header(filename):
+    """
+    Returns: the JSON header of a file written by write_table
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not a columnar table file")
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(header_size))
+
+
+def map_table(filename, header=None):
+    """
+    Maps a file written by write_table without parsing any text. Numeric
+    and code columns are read-only views straight into the mapped file.
+
+    Returns: (TransactionTable, header)
+    """
+    if header is None:
+        header = read_header(filename)
+    with open(filename, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    (header_size,) = struct.unpack_from("<Q", data, len(MAGIC))
+    start = len(MAGIC) + 8 + header_size
+    buffer = memoryview(data)
+    columns = {}
+    for column in header["columns"]:
+        begin = start + column["offset"]
+        columns[column["name"]] = buffer[begin:begin + column["size"]].cast(column["typecode"])
+
+    table = TransactionTable()
+    table.transaction_ids.data = columns["TransactionID.data"]
+    table.transaction_ids.offsets = columns["TransactionID.offsets"]
+    table.quantity = columns["Quantity"]
+    table.unit_price = columns["UnitPrice"]
+    table.revenue = columns["Revenue"]
+    for name in ENCODED_COLUMNS:
+        encoded = table.encoded[name]
+        encoded.values = header["values"][name]
+        encoded._lookup = {value: code for code, value in enumerate(encoded.values)}
+        encoded.codes = columns[name]
+
+    return table, header
+
+
+def save_parsed(filename, table, stats, cache_file=CACHE_FILE):
+    """
+    Caches the validated (unfiltered) table of `filename` and its read /
+    validation stats, keyed by source_key(filename)
+    """
+    write_table(table, cache_file, {"key": source_key(filename), "stats": stats})
+
+
+def load_parsed(filename, cache_file=CACHE_FILE):
+    """
+    Maps the cached table for `filename`, skipping all text parsing
+
+    Returns: (TransactionTable, stats), or None when there is no cache or
+    the source file changed since it was written
+    """
+    try:
+        header = read_header(cache_file)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+    if header.get("key") != source_key(filename):
+        return None
+
+    table, header = map_table(cache_file, header)
+    return table, header["stats"]
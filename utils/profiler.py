@@ -0,0 +1,299 @@
+import cProfile
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: peak RSS is reported as None
+    resource = None
+
+
+# The active RunProfile, None when profiling is disabled (the default).
+# Every hook checks this first, so a disabled profiler costs one global lookup.
+_active = None
+
+# Items a profiled generator produces per timed batch
+ITEM_BATCH = 1024
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 2)
+
+
+class RunProfile:
+    """
+    Wall time, CPU time, rows in/out and peak RSS for every pipeline stage
+    and every instrumented function called during one run
+
+    cprofile_dir: when set, each top-level stage also runs under cProfile
+    and its stats are dumped to <cprofile_dir>/<n>-<stage>.prof
+    """
+
+    def __init__(self, cprofile_dir=None):
+        self.started = time.time()
+        self.cprofile_dir = cprofile_dir
+        self.records = []
+        self._stage = None
+        self._profiler = None
+
+    def _open(self, name, parent, rows_in, cpu_clock=time.process_time):
+        record = {
+            "name": name,
+            "parent": parent,
+            "rows_in": rows_in,
+            "rows_out": None,
+            "wall_seconds": None,
+            "cpu_seconds": None,
+            "rows_per_second": None,
+            "peak_rss_mb": None,
+            "rss_growth_mb": None,
+            "error": None,
+            "_wall": time.perf_counter(),
+            "_cpu_clock": cpu_clock,
+            "_cpu": cpu_clock(),
+            "_rss": _peak_rss_mb()
+        }
+        self.records.append(record)
+        return record
+
+    def _close(self, record, rows_out=None, error=None, elapsed=None):
+        """
+        elapsed: (wall, cpu) seconds measured by the caller, instead of the
+        time since the record was opened
+        """
+        wall = time.perf_counter() - record.pop("_wall")
+        cpu = record.pop("_cpu_clock")() - record.pop("_cpu")
+        if elapsed is not None:
+            wall, cpu = elapsed
+        record["wall_seconds"] = round(wall, 6)
+        record["cpu_seconds"] = round(cpu, 6)
+        if rows_out is not None:
+            record["rows_out"] = rows_out
+        rows = record["rows_in"] if record["rows_in"] is not None else record["rows_out"]
+        if rows is not None and wall > 0:
+            record["rows_per_second"] = round(rows / wall)
+
+        rss_before = record.pop("_rss")
+        record["peak_rss_mb"] = _peak_rss_mb()
+        if rss_before is not None:
+            record["rss_growth_mb"] = round(record["peak_rss_mb"] - rss_before, 2)
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+
+    def begin(self, name, rows_in=None):
+        """
+        Ends the current top-level stage (if any) and starts the next one
+        """
+        self.end()
+        self._stage = self._open(name, None, rows_in)
+        if self.cprofile_dir:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def end(self, rows_out=None, error=None):
+        """
+        Ends the current top-level stage
+        """
+        if self._stage is None:
+            return
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            stage_number = sum(1 for r in self.records if r["parent"] is None)
+            self._profiler.dump_stats(
+                os.path.join(self.cprofile_dir, f"{stage_number:02d}-{self._stage['name']}.prof")
+            )
+            self._profiler = None
+        self._close(self._stage, rows_out, error)
+        self._stage = None
+
+    def set_rows(self, rows_in=None, rows_out=None):
+        """
+        Records row counts for the current top-level stage
+        """
+        if self._stage is None:
+            return
+        if rows_in is not None:
+            self._stage["rows_in"] = rows_in
+        if rows_out is not None:
+            self._stage["rows_out"] = rows_out
+
+    def to_dict(self):
+        return {
+            "started": self.started,
+            "python": sys.version.split()[0],
+            "stages": [r for r in self.records if r["parent"] is None],
+            "functions": [r for r in self.records if r["parent"] is not None]
+        }
+
+    def write(self, filename):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def enable(cprofile_dir=None):
+    """
+    Starts collecting a run profile
+    Returns: RunProfile
+    """
+    global _active
+    _active = RunProfile(cprofile_dir)
+    return _active
+
+
+def disable():
+    """
+    Stops collecting, closing any open stage
+    Returns: the RunProfile that was active, or None
+    """
+    global _active
+    profile, _active = _active, None
+    if profile is not None:
+        profile.end()
+    return profile
+
+
+def begin(name, rows_in=None):
+    """
+    Marks the start of a top-level pipeline stage (ending the previous one)
+    """
+    if _active is not None:
+        _active.begin(name, rows_in)
+
+
+def set_rows(rows_in=None, rows_out=None):
+    if _active is not None:
+        _active.set_rows(rows_in, rows_out)
+
+
+def fail(error):
+    """
+    Ends the current stage, recording the exception that stopped the run
+    """
+    if _active is not None:
+        _active.end(error=error)
+
+
+@contextlib.contextmanager
+def concurrent_stage(name):
+    """
+    Records a top-level stage that runs on its own thread, overlapping
+    the stages marked with begin(). Its CPU time is that thread's alone.
+    """
+    profile = _active
+    if profile is None:
+        yield
+        return
+
+    record = profile._open(name, None, None, cpu_clock=time.thread_time)
+    try:
+        yield
+    except Exception as e:
+        profile._close(record, error=e)
+        raise
+    profile._close(record)
+
+
+def _size(value):
+    if isinstance(value, str):
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _call(profile, name, rows_in, func, args, kwargs, sized_result=True):
+    parent = profile._stage["name"] if profile._stage else ""
+    record = profile._open(name, parent, rows_in)
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        profile._close(record, error=e)
+        raise
+    rows_out = None
+    if sized_result:
+        rows_out = _size(result[0] if isinstance(result, tuple) else result)
+    profile._close(record, rows_out)
+    return result
+
+
+def _timed_items(profile, name, items):
+    """
+    Yields a generator's items, timing only the work of producing them:
+    items are pulled in batches, so the consumer's work between them is
+    not counted. Rows out = items produced.
+    """
+    parent = profile._stage["name"] if profile._stage else ""
+    record = profile._open(name, parent, None)
+    wall = cpu = 0.0
+    count = 0
+    error = None
+    try:
+        while True:
+            started, started_cpu = time.perf_counter(), time.process_time()
+            batch = list(islice(items, ITEM_BATCH))
+            wall += time.perf_counter() - started
+            cpu += time.process_time() - started_cpu
+            if not batch:
+                break
+            count += len(batch)
+            yield from batch
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        profile._close(record, count, error, elapsed=(wall, cpu))
+
+
+def profiled(func):
+    """
+    Decorator recording one profile entry per call, nested under the
+    current stage, with rows in = len(first argument) and rows out =
+    len(result) where those have a length. For a generator function the
+    entry covers producing its items, with rows out = items yielded.
+    """
+    generator = inspect.isgeneratorfunction(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active
+        if profile is None:
+            return func(*args, **kwargs)
+        if generator:
+            return _timed_items(profile, func.__name__, func(*args, **kwargs))
+        return _call(profile, func.__name__, _size(args[0]) if args else None, func, args, kwargs)
+
+    return wrapper
+
+
+def profiled_method(func):
+    """
+    profiled for methods: the entry is named Class.method and rows in =
+    len(first argument after self) where it has a length
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        profile = _active
+        if profile is None:
+            return func(self, *args, **kwargs)
+        return _call(
+            profile, func.__qualname__, _size(args[0]) if args else None,
+            func, (self,) + args, kwargs, sized_result=False
+        )
+
+    return wrapper
@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress, repeat
+from operator import eq, ge, le
+
+
+class TransactionIndex:
+    """
+    Query indexes over a validated TransactionTable, built once:
+    - per region (and overall) a permutation of row IDs sorted by amount,
+      so a min/max amount range is two binary searches
+    - date posting lists of row IDs
+
+    Queries return row IDs in table order, so slices keep the file order.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        revenue = table.revenue
+
+        self._sorted = {None: self._sort_by_amount(range(len(table)), revenue)}
+
+        regions = table.encoded["Region"]
+        postings = {}
+        for row, code in enumerate(regions.codes):
+            postings.setdefault(code, array("I")).append(row)
+        for code, rows in postings.items():
+            self._sorted[regions.values[code]] = self._sort_by_amount(rows, revenue)
+
+        dates = table.encoded["Date"]
+        self.date_postings = {}
+        for row, code in enumerate(dates.codes):
+            self.date_postings.setdefault(dates.values[code], array("I")).append(row)
+
+    @staticmethod
+    def _sort_by_amount(rows, revenue):
+        order = sorted(rows, key=revenue.__getitem__)
+        return array("I", order), array("d", [revenue[row] for row in order])
+
+    def regions(self):
+        return {region for region in self._sorted if region is not None}
+
+    def amount_range(self, region=None):
+        """
+        Returns: (min, max) amount within a region (or overall), None if empty
+        """
+        _, amounts = self._sorted.get(region, (None, None))
+        if not amounts:
+            return None
+        return amounts[0], amounts[-1]
+
+    def _amount_slice(self, region, min_amount, max_amount):
+        rows, amounts = self._sorted.get(region, (array("I"), array("d")))
+        low = 0 if min_amount is None else bisect_left(amounts, min_amount)
+        high = len(amounts) if max_amount is None else bisect_right(amounts, max_amount)
+        return rows, low, max(low, high)
+
+    def query(self, region=None, min_amount=None, max_amount=None, date=None):
+        """
+        Row IDs matching every given filter, in table order
+        """
+        rows, low, high = self._amount_slice(region or None, min_amount, max_amount)
+
+        if date is not None:
+            posting = self.date_postings.get(date, array("I"))
+            if len(posting) < high - low:
+                # Fewer rows on that date: check them against the other filters
+                regions = self.table.encoded["Region"]
+                revenue = self.table.revenue
+                return [
+                    row for row in posting
+                    if (not region or regions[row] == region)
+                    and (min_amount is None or revenue[row] >= min_amount)
+                    and (max_amount is None or revenue[row] <= max_amount)
+                ]
+            dates = self.table.encoded["Date"]
+            return sorted(row for row in rows[low:high] if dates[row] == date)
+
+        return sorted(rows[low:high])
+
+    def select(self, region=None, min_amount=None, max_amount=None, date=None):
+        """
+        Returns: TransactionTable with only the matching rows
+        """
+        return self.table.take(self.query(region, min_amount, max_amount, date))
+
+    def filter_counts(self, region=None, min_amount=None, max_amount=None):
+        """
+        Rows removed by each filter, in the order validate_and_filter applies
+        them, computed from the indexes alone
+        Returns: dict region_filter, min_amount, max_amount
+        """
+        region = region or None
+        rows, amounts = self._sorted.get(region, (array("I"), array("d")))
+        below = 0 if min_amount is None else bisect_left(amounts, min_amount)
+        if max_amount is None:
+            above = 0
+        else:
+            above = len(amounts) - max(below, bisect_right(amounts, max_amount))
+
+        return {
+            "region_filter": len(self.table) - len(rows),
+            "min_amount": below,
+            "max_amount": above
+        }
+
+    def filter(self, summary, region=None, min_amount=None, max_amount=None):
+        """
+        Applies the validate_and_filter region/amount filters through the
+        indexes, updating an unfiltered validate_and_filter summary in place
+        Returns: TransactionTable of the matching rows
+        """
+        table = self.select(region, min_amount, max_amount)
+        amount_filter = min_amount is not None or max_amount is not None
+
+        summary["filtered_by_region"] = len(table) if region else 0
+        summary["filtered_by_amount"] = len(table) if amount_filter else 0
+        summary["final_count"] = len(table)
+        summary.setdefault("rejected_by_rule", {}).update(
+            self.filter_counts(region, min_amount, max_amount)
+        )
+        return table
+
+
+def scan_filter(table, summary, region=None, min_amount=None, max_amount=None):
+    """
+    TransactionIndex.filter for a single query: one linear scan plus
+    take(), cheaper than building indexes that are used once. Updates an
+    unfiltered validate_and_filter summary in place the same way.
+
+    Returns: (TransactionTable of the matching rows, (min, max) amount
+    within the region or overall, None if empty)
+    """
+    if region:
+        regions = table.encoded["Region"]
+        code = regions._lookup.get(region)
+        rows = list(compress(range(len(table)), map(eq, regions.codes, repeat(code))))
+    else:
+        rows = range(len(table))
+    amounts = list(map(table.revenue.__getitem__, rows))
+    amount_range = (min(amounts), max(amounts)) if amounts else None
+
+    counts = {"region_filter": len(table) - len(rows), "min_amount": 0, "max_amount": 0}
+    for name, operator, bound in (("min_amount", ge, min_amount), ("max_amount", le, max_amount)):
+        if bound is None:
+            continue
+        passed = list(map(operator, amounts, repeat(bound)))
+        kept = list(compress(rows, passed))
+        counts[name] = len(rows) - len(kept)
+        rows, amounts = kept, list(compress(amounts, passed))
+
+    filtered = table.take(rows)
+    amount_filter = min_amount is not None or max_amount is not None
+    summary["filtered_by_region"] = len(filtered) if region else 0
+    summary["filtered_by_amount"] = len(filtered) if amount_filter else 0
+    summary["final_count"] = len(filtered)
+    summary.setdefault("rejected_by_rule", {}).update(counts)
+    return filtered, amount_range
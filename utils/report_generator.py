@@ -1,35 +1,84 @@
+import csv
+import json
+import os
+import shutil
 from datetime import datetime
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
-)
-
-
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+from utils.api_handler import EnrichedSales, new_enrichment_summary
+from utils.data_processor import analyze_sales, SalesAggregator
+
+
+SNAPSHOT_FILE = "output/aggregate_snapshot.json"
+EXPORT_DIR = "output/exports"
+EXPORT_FORMATS = ["csv", "json"]
+
+
+def enrichment_summary(enriched_transactions):
+    """
+    Counts API matches over enriched transactions (EnrichedSales already
+    keeps the counts per product)
+    Returns: dict as EnrichedSales.summary
+    """
+    if isinstance(enriched_transactions, EnrichedSales):
+        return enriched_transactions.summary()
+
+    summary = new_enrichment_summary()
+    failed = summary["failed_products"]
+    for tx in enriched_transactions:
+        summary["total"] += 1
+        if tx.get("API_Match"):
+            summary["matched"] += 1
+        else:
+            product_id = tx.get("ProductID")
+            failed[product_id] = failed.get(product_id, 0) + 1
+    return summary
+
+
+def generate_sales_summary(aggregator, output_file="output/sales_summary.txt"):
+    """
+    Writes the short sales summary from a SalesAggregator
+    """
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("SALES SUMMARY REPORT\n")
+        f.write("=" * 20 + "\n\n")
+        f.write(f"Total Revenue: ₹{aggregator.total_revenue:,.2f}\n\n")
+
+        f.write("Sales by Region:\n")
+        for region, (total, _) in aggregator.regions.items():
+            f.write(f"- {region}: ₹{total:,.2f}\n")
+
+        if aggregator.products:
+            top_product = max(aggregator.products.items(), key=lambda x: x[1][1])[0]
+            f.write(f"\nTop Selling Product: {top_product}\n")
+
+    print("Sales summary generated at:", output_file)
+
+
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt",
+                          analysis=None, enrichment=None):
+    """
+    Writes the sales report, reusing a precomputed analysis and enrichment
+    summary when given
+    """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    total_revenue = calculate_total_revenue(transactions)
-    total_transactions = len(transactions)
-    avg_order_value = total_revenue / total_transactions if total_transactions else 0
+    if analysis is None:
+        analysis = analyze_sales(transactions)
 
-    dates = [tx["date"] for tx in transactions if "date" in tx]
-    date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
+    total_revenue = analysis["total_revenue"]
+    total_transactions = analysis["total_transactions"]
+    avg_order_value = analysis["avg_order_value"]
+    date_range = analysis["date_range"]
 
-    region_sales = region_wise_sales(transactions)
-    top_products = top_selling_products(transactions)
-    customers = customer_analysis(transactions)
-    daily_trend = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
-    low_products = low_performing_products(transactions)
+    region_sales = analysis["region_sales"]
+    top_products = analysis["top_products"]
+    customers = analysis["customers"]
+    daily_trend = analysis["daily_trend"]
+    peak_day = analysis["peak_day"]
+    low_products = analysis["low_products"]
 
-    api_matches = [tx for tx in enriched_transactions if tx.get("API_Match")]
-    api_failures = [tx for tx in enriched_transactions if not tx.get("API_Match")]
-    api_success_rate = (len(api_matches) / len(enriched_transactions) * 100) if enriched_transactions else 0
+    if enrichment is None:
+        enrichment = enrichment_summary(enriched_transactions)
+    api_success_rate = (enrichment["matched"] / enrichment["total"] * 100) if enrichment["total"] else 0
 
     with open(output_file, "w", encoding="utf-8") as f:
         f.write("=" * 40 + "\n")
@@ -68,6 +117,11 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         # TOP CUSTOMERS
         f.write("TOP 5 CUSTOMERS\n")
         f.write("-" * 40 + "\n")
+        if analysis.get("customers_error") is not None:
+            f.write(
+                f"(approximate: totals may be overstated by up to "
+                f"₹{analysis['customers_error']:,.0f})\n"
+            )
         f.write("Rank | Customer | Total Spent | Orders\n")
         for i, (cid, info) in enumerate(list(customers.items())[:5], 1):
             f.write(
@@ -78,6 +132,11 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         # DAILY TREND
         f.write("DAILY SALES TREND\n")
         f.write("-" * 40 + "\n")
+        if analysis.get("distinct_error") is not None:
+            f.write(
+                f"(approximate: customer counts within about "
+                f"±{analysis['distinct_error'] * 100:.1f}%)\n"
+            )
         f.write("Date | Revenue | Transactions | Customers\n")
         for date, info in daily_trend.items():
             f.write(
@@ -86,10 +145,35 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
             )
         f.write("\n")
 
+        # WEEKLY / MONTHLY ROLLUPS
+        for title, key in (("WEEKLY SALES (week starting Monday)", "weekly_trend"),
+                           ("MONTHLY SALES", "monthly_trend")):
+            if not analysis.get(key):
+                continue
+            f.write(f"{title}\n")
+            f.write("-" * 40 + "\n")
+            f.write("Period | Revenue | Transactions\n")
+            for period, info in analysis[key].items():
+                f.write(f"{period} | ₹{info['revenue']:,.0f} | {info['transaction_count']}\n")
+            f.write("\n")
+
         # PERFORMANCE INSIGHTS
         f.write("PRODUCT PERFORMANCE ANALYSIS\n")
         f.write("-" * 40 + "\n")
         f.write(f"Best Selling Day: {peak_day}\n")
+        best_window = analysis.get("best_window")
+        if best_window:
+            f.write(
+                f"Best {best_window['days']}-Day Window: {best_window['start']} to "
+                f"{best_window['end']} (₹{best_window['revenue']:,.0f})\n"
+            )
+        quarter_to_date = analysis.get("quarter_to_date")
+        if quarter_to_date:
+            f.write(
+                f"Quarter to Date (through {quarter_to_date['through']}): "
+                f"₹{quarter_to_date['revenue']:,.0f} | "
+                f"{quarter_to_date['transaction_count']} transactions\n"
+            )
         f.write("Low Performing Products:\n")
         for product in low_products:
             f.write(f"{product}\n")
@@ -98,10 +182,145 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         # API SUMMARY
         f.write("API ENRICHMENT SUMMARY\n")
         f.write("-" * 40 + "\n")
-        f.write(f"Total Records Enriched: {len(api_matches)}\n")
+        f.write(f"Total Records Enriched: {enrichment['matched']}\n")
         f.write(f"Success Rate: {api_success_rate:.2f}%\n")
         f.write("Failed Product IDs:\n")
-        for tx in api_failures:
-            f.write(f"{tx.get('ProductID')}\n")
+        for product_id, count in enrichment["failed_products"].items():
+            f.write(f"{product_id}: {count} records\n")
 
     print("Sales report generated at:", output_file)
+
+
+def save_snapshot(aggregator, enrichment, filename=SNAPSHOT_FILE):
+    """
+    Saves everything the reports are rendered from: the aggregator state
+    (with per-day unique customers as counts) and the enrichment summary,
+    no transactions. Spilled customers are moved next to it, into
+    <filename>.customers
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    spill_dir = filename + ".customers"
+    if aggregator.customer_spill is not None and aggregator.customer_spill.spilled:
+        aggregator.customer_spill.persist(spill_dir)
+    else:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    snapshot = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "aggregator": aggregator.to_state(render_only=True),
+        "enrichment": enrichment
+    }
+    temp_file = filename + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(temp_file, filename)
+
+
+def load_snapshot(filename=SNAPSHOT_FILE):
+    """
+    Returns: (SalesAggregator, enrichment summary) saved by save_snapshot
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    enrichment = snapshot["enrichment"]
+    if "failed_product_ids" in enrichment:
+        # Saved before failed rows were counted per product
+        failed = enrichment["failed_products"] = {}
+        for product_id in enrichment.pop("failed_product_ids"):
+            failed[product_id] = failed.get(product_id, 0) + 1
+    return SalesAggregator.from_state(snapshot["aggregator"]), enrichment
+
+
+def export_csv(analysis, export_dir=EXPORT_DIR):
+    """
+    Writes one CSV file per analysis table into export_dir
+    Returns: list of files written
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    tables = {
+        "region_sales": (
+            ["Region", "TotalSales", "TransactionCount", "Percentage"],
+            [
+                [region, data["total_sales"], data["transaction_count"], data["percentage"]]
+                for region, data in analysis["region_sales"].items()
+            ]
+        ),
+        "top_products": (
+            ["ProductName", "Quantity", "Revenue"],
+            analysis["top_products"]
+        ),
+        "customers": (
+            ["CustomerID", "TotalSpent", "PurchaseCount", "AvgOrderValue", "ProductsBought"],
+            [
+                [cid, info["total_spent"], info["purchase_count"], info["avg_order_value"],
+                 ";".join(info["products_bought"])]
+                for cid, info in analysis["customers"].items()
+            ]
+        ),
+        "daily_trend": (
+            ["Date", "Revenue", "TransactionCount", "UniqueCustomers"],
+            [
+                [date, info["revenue"], info["transaction_count"], info["unique_customers"]]
+                for date, info in analysis["daily_trend"].items()
+            ]
+        ),
+        "low_products": (
+            ["ProductName", "Quantity", "Revenue"],
+            analysis["low_products"]
+        )
+    }
+    for name in ("weekly_trend", "monthly_trend"):
+        if name in analysis:
+            tables[name] = (
+                ["Period", "Revenue", "TransactionCount"],
+                [
+                    [period, info["revenue"], info["transaction_count"]]
+                    for period, info in analysis[name].items()
+                ]
+            )
+
+    files = []
+    for name, (header, rows) in tables.items():
+        filename = os.path.join(export_dir, f"{name}.csv")
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        files.append(filename)
+    return files
+
+
+def export_json(analysis, enrichment, export_dir=EXPORT_DIR):
+    """
+    Writes the whole analysis and enrichment summary as one JSON file
+    Returns: list of files written
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    filename = os.path.join(export_dir, "analysis.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({**analysis, "enrichment": enrichment}, f, indent=2)
+    return [filename]
+
+
+def render_reports(aggregator, enrichment, report_file="output/sales_report.txt",
+                   summary_file="output/sales_summary.txt", exports=(), export_dir=EXPORT_DIR):
+    """
+    Renders the report, summary and optional exports ("csv", "json") from
+    aggregates alone, e.g. as returned by load_snapshot
+    """
+    generate_sales_report(
+        None, None, report_file,
+        analysis=aggregator.result(top_customers=5), enrichment=enrichment
+    )
+    generate_sales_summary(aggregator, summary_file)
+
+    if exports:
+        # Exports list every customer, not just the top 5
+        analysis = aggregator.result()
+        files = []
+        if "csv" in exports:
+            files += export_csv(analysis, export_dir)
+        if "json" in exports:
+            files += export_json(analysis, enrichment, export_dir)
+        print("Exports written:", ", ".join(files))
@@ -0,0 +1,264 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+
+
+def day_ordinal(text):
+    """
+    Converts a YYYY-MM-DD date string to its proleptic Gregorian day number
+    Raises: ValueError for anything else
+    """
+    return date.fromisoformat(text).toordinal()
+
+
+class DailySeries:
+    """
+    Per-day revenue, transaction and customer-day arrays over the distinct
+    days with sales, in date order, with prefix sums: the total of any
+    date range is two binary searches and two lookups. Days are integer
+    ordinals, parsed once, and days without sales take no space.
+
+    Unique customers cannot be added across days, so ranges report
+    customer-days (the sum of each day's unique customers).
+    A sparse table over daily revenue answers the peak day of any range
+    in O(1) after an O(n log n) build.
+    """
+
+    def __init__(self, ordinals, revenue, counts, customers):
+        self.ordinals = ordinals
+        self.days = len(ordinals)
+        self.revenue = revenue
+        self.counts = counts
+        self.customers = customers
+        self._revenue_sum = array("d", accumulate(revenue, initial=0))
+        self._count_sum = array("q", accumulate(counts, initial=0))
+        self._customer_sum = array("q", accumulate(customers, initial=0))
+        self._peaks = self._sparse_table(revenue)
+
+    @classmethod
+    def from_daily(cls, daily):
+        """
+        daily: mapping date string -> (revenue, transaction count, unique customers)
+        Dates that are not YYYY-MM-DD are left out and listed in .skipped
+
+        Returns: DailySeries
+        """
+        by_day = {}
+        skipped = []
+        for text, values in daily.items():
+            try:
+                by_day[day_ordinal(text)] = values
+            except (TypeError, ValueError):
+                skipped.append(text)
+
+        ordinals = array("q", sorted(by_day))
+        revenue = array("d")
+        counts = array("q")
+        customers = array("q")
+        for ordinal in ordinals:
+            day_revenue, day_count, day_customers = by_day[ordinal]
+            revenue.append(day_revenue)
+            counts.append(day_count)
+            customers.append(day_customers)
+
+        series = cls(ordinals, revenue, counts, customers)
+        series.skipped = skipped
+        return series
+
+    @staticmethod
+    def _sparse_table(values):
+        # levels[k][i] = index of the largest value in values[i:i + 2**k]
+        levels = [array("I", range(len(values)))]
+        width = 1
+        while 2 * width <= len(values):
+            previous = levels[-1]
+            level = array("I")
+            for i in range(len(values) - 2 * width + 1):
+                left, right = previous[i], previous[i + width]
+                level.append(right if values[right] > values[left] else left)
+            levels.append(level)
+            width *= 2
+        return levels
+
+    @staticmethod
+    def _ordinal(day):
+        """
+        Day number of a date string, date or ordinal
+        """
+        if isinstance(day, str):
+            return day_ordinal(day)
+        if isinstance(day, date):
+            return day.toordinal()
+        return day
+
+    def _bounds(self, start, end):
+        """
+        Returns: (low, high) positions of the sale days in [start, end]
+        """
+        low = 0 if start is None else bisect_left(self.ordinals, self._ordinal(start))
+        high = self.days - 1 if end is None else bisect_right(self.ordinals, self._ordinal(end)) - 1
+        return low, high
+
+    def _revenue_between(self, first, last):
+        """
+        Revenue over the inclusive day-number range [first, last]
+        """
+        sums = self._revenue_sum
+        return sums[bisect_right(self.ordinals, last)] - sums[bisect_left(self.ordinals, first)]
+
+    def date_at(self, index):
+        return date.fromordinal(self.ordinals[index]).isoformat()
+
+    def total(self, start=None, end=None):
+        """
+        Totals over the inclusive range [start, end] (whole series by default)
+        Returns: (revenue, transaction count, customer-days)
+        """
+        low, high = self._bounds(start, end)
+        if low > high:
+            return 0.0, 0, 0
+        return (
+            self._revenue_sum[high + 1] - self._revenue_sum[low],
+            self._count_sum[high + 1] - self._count_sum[low],
+            self._customer_sum[high + 1] - self._customer_sum[low]
+        )
+
+    def peak_day(self, start=None, end=None):
+        """
+        Highest-revenue day in [start, end]; the earliest one on ties
+        Returns: (date, revenue), or (None, 0) for a range without sales
+        """
+        low, high = self._bounds(start, end)
+        if low > high:
+            return None, 0
+        level = (high - low + 1).bit_length() - 1
+        table = self._peaks[level]
+        left, right = table[low], table[high - (1 << level) + 1]
+        best = right if self.revenue[right] > self.revenue[left] else left
+        return self.date_at(best), self.revenue[best]
+
+    def rolling(self, window):
+        """
+        Revenue of the `window` calendar days ending on each sale day
+        Returns: list of (date, revenue)
+        """
+        return [
+            (self.date_at(i), self._revenue_between(ordinal - window + 1, ordinal))
+            for i, ordinal in enumerate(self.ordinals)
+        ]
+
+    def peak_window(self, window):
+        """
+        The `window`-day span within the series with the highest revenue
+        (earliest on ties). A span's revenue only rises when a sale day
+        enters it, so the only candidate starts are the first day and the
+        days `window` - 1 before each sale day.
+
+        Returns: (first date, last date, revenue), or None when empty
+        """
+        if not self.days:
+            return None
+        first, last = self.ordinals[0], self.ordinals[-1]
+        window = min(window, last - first + 1)
+        latest = last - window + 1
+        best, best_revenue = first, self._revenue_between(first, first + window - 1)
+        for ordinal in self.ordinals:
+            start = ordinal - window + 1
+            if first < start <= latest:
+                revenue = self._revenue_between(start, ordinal)
+                if revenue > best_revenue:
+                    best, best_revenue = start, revenue
+        return (
+            date.fromordinal(best).isoformat(),
+            date.fromordinal(best + window - 1).isoformat(),
+            best_revenue
+        )
+
+    def _periods(self, start_of, next_start):
+        """
+        Totals per calendar period; each is one prefix-sum lookup
+        Returns: list of (period first day, revenue, transaction count)
+        """
+        periods = []
+        if not self.days:
+            return periods
+        last = date.fromordinal(self.ordinals[-1])
+        start = start_of(date.fromordinal(self.ordinals[0]))
+        while start <= last:
+            following = next_start(start)
+            revenue, count, _ = self.total(start, following - timedelta(days=1))
+            periods.append((start, revenue, count))
+            start = following
+        return periods
+
+    def weekly(self):
+        """
+        Returns: list of (Monday of the ISO week, revenue, transaction count)
+        """
+        return [
+            (start.isoformat(), revenue, count)
+            for start, revenue, count in self._periods(
+                lambda day: day - timedelta(days=day.weekday()),
+                lambda start: start + timedelta(days=7)
+            )
+        ]
+
+    def monthly(self):
+        """
+        Returns: list of ("YYYY-MM", revenue, transaction count)
+        """
+        return [
+            (start.strftime("%Y-%m"), revenue, count)
+            for start, revenue, count in self._periods(
+                lambda day: day.replace(day=1),
+                lambda start: (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            )
+        ]
+
+    def quarter_to_date(self, day):
+        """
+        Totals from the first day of the quarter containing `day` to `day`
+        Returns: (revenue, transaction count, customer-days)
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        start = date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+        return self.total(start, day)
+
+
+def trend_rollups(daily_trend, window=7):
+    """
+    Coarser views of a daily trend (date -> revenue, transaction_count,
+    unique_customers), all read off one DailySeries
+
+    Returns: dict with weekly_trend and monthly_trend (period -> revenue,
+    transaction_count), best_window (the `window`-day span with the highest
+    revenue) and quarter_to_date (for the quarter of the last sale)
+    """
+    series = DailySeries.from_daily({
+        date: (info["revenue"], info["transaction_count"], info["unique_customers"])
+        for date, info in daily_trend.items()
+    })
+
+    def periods(rows):
+        return {
+            label: {"revenue": round(revenue, 2), "transaction_count": count}
+            for label, revenue, count in rows
+        }
+
+    best_window = None
+    quarter_to_date = None
+    if series.days:
+        first, last, revenue = series.peak_window(window)
+        best_window = {"days": window, "start": first, "end": last, "revenue": round(revenue, 2)}
+        last_day = series.date_at(series.days - 1)
+        revenue, count, _ = series.quarter_to_date(last_day)
+        quarter_to_date = {"through": last_day, "revenue": round(revenue, 2), "transaction_count": count}
+
+    return {
+        "weekly_trend": periods(series.weekly()),
+        "monthly_trend": periods(series.monthly()),
+        "best_window": best_window,
+        "quarter_to_date": quarter_to_date
+    }
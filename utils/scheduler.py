@@ -0,0 +1,84 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils import profiler
+
+
+class StageGraph:
+    """
+    Pipeline stages with their dependencies.
+
+    Foreground stages run on the calling thread, in the order they were
+    added, because they print progress and may prompt. Background stages
+    start on their own thread as soon as the run begins and wait there for
+    their dependencies, so they overlap every foreground stage that does
+    not need them. A stage is called with its dependencies' outputs as
+    positional arguments, in the order listed.
+
+    Dependencies must be added before the stages that use them, so the
+    graph cannot have cycles.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, func, deps=(), background=False):
+        """
+        Adds a stage; returns the graph so calls can be chained
+        Raises: ValueError for a duplicate name or an unknown dependency
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' added twice")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(unknown)}")
+        self.stages[name] = (func, tuple(deps), background)
+        return self
+
+    def run(self):
+        """
+        Runs every stage; an exception in any stage is re-raised here
+        once the foreground reaches it (or at the end)
+
+        Returns: dict stage name -> output
+        """
+        futures = {name: Future() for name in self.stages}
+
+        def run_stage(name):
+            func, deps, background = self.stages[name]
+            future = futures[name]
+            try:
+                if not background and not all(futures[dep].done() for dep in deps):
+                    # Time spent blocked on background stages shows up on its own
+                    profiler.begin(f"wait_{name}")
+                inputs = [futures[dep].result() for dep in deps]
+                if background:
+                    with profiler.concurrent_stage(name):
+                        output = func(*inputs)
+                else:
+                    output = func(*inputs)
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                if not background:
+                    raise
+            else:
+                if not future.done():
+                    future.set_result(output)
+
+        background = [name for name, (_, _, is_background) in self.stages.items() if is_background]
+        pool = ThreadPoolExecutor(max_workers=max(1, len(background)), thread_name_prefix="stage")
+        try:
+            for name in background:
+                pool.submit(run_stage, name)
+            for name, (_, _, is_background) in self.stages.items():
+                if not is_background:
+                    run_stage(name)
+            return {name: future.result() for name, future in futures.items()}
+        except BaseException:
+            # Unblock background stages still waiting on a stage that never ran
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("pipeline stopped"))
+            raise
+        finally:
+            pool.shutdown(wait=True)
@@ -0,0 +1,253 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils.data_processor import iter_transactions, validate_into_table, SalesAggregator
+from utils.file_handler import iter_sales_data
+from utils.parse_cache import load_parsed, save_parsed, source_key
+from utils.query_index import TransactionIndex
+
+
+CACHE_SIZE = 256
+
+# Analyses served at /<name>; /analysis returns all of them at once
+METRICS = [
+    "region_sales",
+    "top_products",
+    "customers",
+    "daily_trend",
+    "peak_day",
+    "low_products",
+    "weekly_trend",
+    "monthly_trend"
+]
+
+# Accepted query parameters (with the batch-mode short spellings)
+FILTER_ALIASES = {"min": "min_amount", "max": "max_amount"}
+FILTER_DEFAULTS = {"region": None, "min_amount": None, "max_amount": None, "n": 5, "threshold": 10}
+
+
+def parse_filters(query_string):
+    """
+    Normalizes request parameters such as "region=North&min=500&n=10" so
+    equivalent requests share one cache entry
+
+    Returns: tuple (region, min_amount, max_amount, n, threshold)
+    Raises: ValueError for unknown parameters or bad numbers
+    """
+    params = dict(FILTER_DEFAULTS)
+    for key, values in parse_qs(query_string, keep_blank_values=True).items():
+        key = FILTER_ALIASES.get(key, key)
+        if key not in params:
+            raise ValueError(f"Unknown parameter '{key}'")
+        value = values[-1].strip()
+        if not value:
+            continue
+        if key == "region":
+            params[key] = value
+        elif key in ("min_amount", "max_amount"):
+            params[key] = float(value)
+        else:
+            params[key] = int(value)
+    return tuple(params[key] for key in FILTER_DEFAULTS)
+
+
+class SalesService:
+    """
+    Keeps one sales file parsed, validated and indexed in memory and
+    answers filtered analytics from it.
+
+    Results are kept in an LRU cache keyed by the normalized filters.
+    Every request stats the source; when its size or mtime changed and
+    its fingerprint (parse_cache.source_key) no longer matches, the data
+    is reloaded and the cache cleared.
+    """
+
+    def __init__(self, source, aggregator_options=None, use_cache=True, cache_size=CACHE_SIZE):
+        self.source = source
+        self.aggregator_options = aggregator_options or {}
+        self.use_cache = use_cache
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stat = None
+        self.key = None
+        self.index = None
+
+    def load(self):
+        """
+        Reads, parses and validates the source (or maps the parsed-data
+        cache) and clears cached results
+        """
+        key = source_key(self.source)
+        stat_result = os.stat(self.source)
+
+        cached = load_parsed(self.source) if self.use_cache else None
+        if cached is None:
+            read_stats = {}
+            rejects = []
+            table, invalid, summary, regions, amount_range = validate_into_table(
+                iter_transactions(iter_sales_data(self.source, stats=read_stats), rejects)
+            )
+            # Same console output as validate_and_filter
+            print("Available Regions:", regions)
+            if amount_range:
+                print("Transaction Amount Range:", amount_range[0], "-", amount_range[1])
+            if self.use_cache:
+                try:
+                    save_parsed(self.source, table, {
+                        "lines": read_stats.get("lines", 0),
+                        "parsed": summary["total_input"],
+                        "malformed": len(rejects),
+                        "invalid": invalid,
+                        "summary": summary
+                    })
+                except OSError as e:
+                    print(f"⚠ Could not write the parsed-data cache: {e}")
+        else:
+            table, _ = cached
+
+        self.index = TransactionIndex(table)
+        self.key = key
+        self._stat = (stat_result.st_size, stat_result.st_mtime_ns)
+        self._cache.clear()
+        self.loads += 1
+        return self
+
+    def _check_source(self):
+        """
+        Reloads when the source file changed; a stat call when it did not
+        """
+        stat_result = os.stat(self.source)
+        if (stat_result.st_size, stat_result.st_mtime_ns) == self._stat:
+            return
+        if source_key(self.source) != self.key:
+            print(f"Source changed, reloading {self.source}")
+            self.load()
+        else:
+            self._stat = (stat_result.st_size, stat_result.st_mtime_ns)
+
+    def _entry(self, filters):
+        """
+        Cached analysis for normalized filters, computed on a miss
+        Returns: dict with the analysis and its already encoded responses
+        """
+        self._check_source()
+        entry = self._cache.get(filters)
+        if entry is not None:
+            self._cache.move_to_end(filters)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        region, min_amount, max_amount, n, threshold = filters
+        table = self.index.select(region, min_amount, max_amount)
+        aggregator = SalesAggregator(**self.aggregator_options).update(table)
+        entry = {
+            "analysis": aggregator.result(n, threshold, top_customers=n),
+            "encoded": {}
+        }
+        aggregator.close()
+        self._cache[filters] = entry
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def response(self, metric, filters):
+        """
+        metric: one of METRICS, or "analysis" for everything
+        Returns: JSON bytes of that part of the analysis
+        """
+        with self._lock:
+            entry = self._entry(filters)
+            body = entry["encoded"].get(metric)
+            if body is None:
+                analysis = entry["analysis"]
+                value = analysis if metric == "analysis" else analysis[metric]
+                body = json.dumps(value).encode("utf-8")
+                entry["encoded"][metric] = body
+            return body
+
+    def health(self):
+        with self._lock:
+            self._check_source()
+            return {
+                "source": self.source,
+                "rows": len(self.index.table),
+                "loads": self.loads,
+                "cache": {
+                    "entries": len(self._cache),
+                    "capacity": self.cache_size,
+                    "hits": self.hits,
+                    "misses": self.misses
+                }
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        name = url.path.strip("/") or "analysis"
+        try:
+            if name == "health":
+                status, body = 200, json.dumps(service.health()).encode("utf-8")
+            elif name == "analysis" or name in METRICS:
+                status, body = 200, service.response(name, parse_filters(url.query))
+            else:
+                status, body = 404, json.dumps({"error": f"Unknown path /{name}"}).encode("utf-8")
+        except ValueError as e:
+            status, body = 400, json.dumps({"error": str(e)}).encode("utf-8")
+        except Exception as e:
+            status, body = 500, json.dumps({"error": str(e)}).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Dashboards poll every few seconds: no per-request logging
+        pass
+
+
+class _TCPHandler(_Handler):
+    # Headers and body are separate writes: without TCP_NODELAY, keep-alive
+    # responses wait ~40 ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, address):
+    """
+    address: "PORT", "HOST:PORT", or a Unix socket path (anything with a "/")
+    Returns: HTTP server answering from `service`, not yet serving
+    """
+    if "/" in address:
+        try:
+            if stat.S_ISSOCK(os.stat(address).st_mode):
+                # Left behind by a previous run
+                os.remove(address)
+        except FileNotFoundError:
+            pass
+        server = _UnixHTTPServer(address, _Handler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _TCPHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
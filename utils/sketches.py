@@ -0,0 +1,301 @@
+import hashlib
+import heapq
+import math
+from array import array
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving heavy-hitter summary with at most `capacity` keys.
+
+    Every key whose true weight exceeds total / capacity is kept, and each
+    estimate overstates the true weight by at most errors[key], which is
+    itself at most total / capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # Min-heap of (count, key); entries go stale as counts grow and are
+        # refreshed lazily when they reach the top
+        self._heap = []
+
+    def add(self, key, weight=1):
+        self.total += weight
+        counts = self.counts
+
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (weight, key))
+        else:
+            min_key, min_count = self._pop_min()
+            del counts[min_key]
+            del self.errors[min_key]
+            counts[key] = min_count + weight
+            self.errors[key] = min_count
+            heapq.heappush(self._heap, (counts[key], key))
+
+    def _pop_min(self):
+        heap = self._heap
+        while True:
+            count, key = heapq.heappop(heap)
+            current = self.counts[key]
+            if current == count:
+                return key, count
+            heapq.heappush(heap, (current, key))
+
+    def min_count(self):
+        """
+        Weight a key missing from the summary may have had at most
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def error_bound(self):
+        return self.total / self.capacity
+
+    def top(self, n):
+        """
+        Returns: list of (key, estimated weight, max overestimate), heaviest first
+        """
+        heaviest = heapq.nlargest(n, self.counts.items(), key=lambda x: x[1])
+        return [(key, count, self.errors[key]) for key, count in heaviest]
+
+    def merge(self, other):
+        """
+        Combines another summary into this one (mergeable summaries rule:
+        a key missing from one side is charged that side's min count)
+        """
+        own_floor = self.min_count()
+        other_floor = other.min_count()
+
+        counts = {}
+        errors = {}
+        for key in self.counts.keys() | other.counts.keys():
+            counts[key] = self.counts.get(key, own_floor) + other.counts.get(key, other_floor)
+            errors[key] = (
+                self.errors.get(key, own_floor) + other.errors.get(key, other_floor)
+            )
+
+        kept = heapq.nlargest(self.capacity, counts.items(), key=lambda x: x[1])
+        self.counts = dict(kept)
+        self.errors = {key: errors[key] for key in self.counts}
+        self.total += other.total
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def to_state(self):
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counts": self.counts,
+            "errors": self.errors
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls(state["capacity"])
+        summary.total = state["total"]
+        summary.counts = dict(state["counts"])
+        summary.errors = dict(state["errors"])
+        summary._heap = [(count, key) for key, count in summary.counts.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: estimates never undercount, and overcount by at most
+    epsilon * total with probability at least 1 - delta.
+    Hashing is stable across processes, so sketches can be merged.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.total = 0
+        self.rows = [array("d", bytes(8 * self.width)) for _ in range(self.depth)]
+
+    def _indexes(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        self.total += count
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+
+    def estimate(self, key):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def error_bound(self):
+        return self.epsilon * self.total
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must have the same dimensions to merge")
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+        self.total += other.total
+        return self
+
+    def to_state(self):
+        return {
+            "epsilon": self.epsilon,
+            "delta": self.delta,
+            "total": self.total,
+            "rows": [list(row) for row in self.rows]
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state["epsilon"], state["delta"])
+        sketch.total = state["total"]
+        sketch.rows = [array("d", row) for row in state["rows"]]
+        return sketch
+
+
+def _hash64(key):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2**precision one-byte registers.
+    Relative standard error is 1.04 / sqrt(2**precision), e.g. 1.6% at the
+    default precision 12 (4 KB). Registers merge by taking the maximum.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @staticmethod
+    def relative_error(precision):
+        return 1.04 / math.sqrt(1 << precision)
+
+    def add(self, key):
+        value = _hash64(key)
+        precision = self.precision
+        index = value & ((1 << precision) - 1)
+        rest = value >> precision
+        rank = (64 - precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLog sketches must have the same precision to merge")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+
+class DistinctCounter:
+    """
+    Counts distinct keys exactly with a set until it holds more than
+    `exact_limit` keys, then switches to a HyperLogLog of the given precision,
+    so small inputs stay exact and large ones use bounded memory
+    """
+
+    __slots__ = ("exact_limit", "precision", "keys", "sketch")
+
+    def __init__(self, exact_limit=1000, precision=12, keys=()):
+        self.exact_limit = exact_limit
+        self.precision = precision
+        self.keys = set(keys)
+        self.sketch = None
+        if len(self.keys) > exact_limit:
+            self._promote()
+
+    @property
+    def exact(self):
+        return self.sketch is None
+
+    def _promote(self):
+        self.sketch = HyperLogLog(self.precision)
+        for key in self.keys:
+            self.sketch.add(key)
+        self.keys = None
+
+    def add(self, key):
+        if self.sketch is None:
+            self.keys.add(key)
+            if len(self.keys) > self.exact_limit:
+                self._promote()
+        else:
+            self.sketch.add(key)
+
+    def update(self, other):
+        """
+        Merges another DistinctCounter (or any iterable of keys) into this one
+        """
+        if not isinstance(other, DistinctCounter):
+            for key in other:
+                self.add(key)
+            return self
+
+        if other.sketch is None:
+            for key in other.keys:
+                self.add(key)
+        else:
+            if self.sketch is None:
+                self._promote()
+            self.sketch.merge(other.sketch)
+        return self
+
+    def count(self):
+        if self.sketch is None:
+            return len(self.keys)
+        return self.sketch.count()
+
+    def to_state(self):
+        if self.sketch is None:
+            return {"keys": sorted(self.keys)}
+        return {"registers": self.sketch.registers.hex()}
+
+    @classmethod
+    def from_state(cls, state, exact_limit=1000, precision=12):
+        if "keys" in state:
+            return cls(exact_limit, precision, state["keys"])
+        counter = cls(exact_limit, precision)
+        counter.keys = None
+        counter.sketch = HyperLogLog(precision)
+        counter.sketch.registers = bytearray.fromhex(state["registers"])
+        return counter
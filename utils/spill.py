@@ -0,0 +1,271 @@
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+
+
+SPILL_DIR = "output/customer_spill"
+# Partitions per level: a partition holding more customers than fit in the
+# budget is split again, into as many, on the next digit of the hash
+SPILL_PARTITIONS = 16
+# crc32 values are below this, so there are no digits left past it
+HASH_RANGE = 1 << 32
+# Rough size of one in-memory customer entry (key, list, totals and a small
+# product set), used to turn a memory budget into an entry count
+CUSTOMER_ENTRY_BYTES = 512
+
+
+def _partition(customer, partitions, level=0):
+    # crc32 rather than hash(): stable across the worker processes. Level n
+    # uses the n-th base-`partitions` digit, so a split separates customers
+    # that shared a partition one level up
+    return zlib.crc32(customer.encode("utf-8")) // partitions ** level % partitions
+
+
+class CustomerSpill:
+    """
+    Per-customer totals [spent, purchase count, distinct products, first
+    row] kept in memory up to max_entries customers. Past that, the
+    partial totals are hash-partitioned by CustomerID and appended to
+    spill files, so each customer's partials all land in one partition
+    and partitions can be merged one at a time. A partition with more than
+    max_entries customers is split recursively before it is merged, so
+    memory stays within the budget whatever the number of customers.
+
+    `first` is the row at which the customer was first seen, so ranking by
+    (-rounded spend, first) gives the same order as the in-memory stable
+    sort over first-seen customers.
+    """
+
+    def __init__(self, max_entries, directory=None, partitions=SPILL_PARTITIONS, level=0):
+        self.max_entries = max(1, int(max_entries))
+        self.directory = directory
+        self.partitions = partitions
+        self.level = level
+        self.memory = {}
+
+    @classmethod
+    def for_budget(cls, memory_budget_mb, directory=None, partitions=SPILL_PARTITIONS):
+        return cls(memory_budget_mb * 1e6 // CUSTOMER_ENTRY_BYTES, directory, partitions)
+
+    @property
+    def spilled(self):
+        return self.directory is not None
+
+    def _path(self, partition):
+        return os.path.join(self.directory, f"part-{partition:03d}.pkl")
+
+    def add(self, customer, revenue, product, row, new_distinct):
+        entry = self.memory.get(customer)
+        if entry is None:
+            self.memory[customer] = [revenue, 1, new_distinct(product), row]
+            if len(self.memory) > self.max_entries:
+                self.spill()
+        else:
+            entry[0] += revenue
+            entry[1] += 1
+            entry[2].add(product)
+
+    def _append(self, entries):
+        """
+        Appends (customer, entry) pairs to their partition files
+        """
+        if self.directory is None:
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            self.directory = tempfile.mkdtemp(prefix="customers-", dir=SPILL_DIR)
+
+        batches = [[] for _ in range(self.partitions)]
+        for customer, entry in entries:
+            batches[_partition(customer, self.partitions, self.level)].append((customer, entry))
+        for partition, batch in enumerate(batches):
+            if batch:
+                with open(self._path(partition), "ab") as f:
+                    pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def spill(self):
+        """
+        Moves every in-memory customer to the spill files
+        """
+        if self.memory:
+            self._append(self.memory.items())
+            self.memory = {}
+
+    def _read_batches(self, partition):
+        try:
+            with open(self._path(partition), "rb") as f:
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        return
+        except FileNotFoundError:
+            return
+
+    def load_partition(self, partition, limit=None):
+        """
+        Merges every partial of one partition
+        Returns: dict customer -> [spent, count, products, first row], or
+        None as soon as it would hold more than `limit` customers
+        """
+        merged = {}
+        for batch in self._read_batches(partition):
+            for customer, (spent, count, products, first) in batch:
+                entry = merged.get(customer)
+                if entry is None:
+                    if limit is not None and len(merged) >= limit:
+                        return None
+                    merged[customer] = [spent, count, products, first]
+                else:
+                    entry[0] += spent
+                    entry[1] += count
+                    entry[2].update(products)
+                    entry[3] = min(entry[3], first)
+        return merged
+
+    def merged_groups(self, partition):
+        """
+        Yields the merged customers of one partition in dicts of at most
+        max_entries customers. A partition with more is split into a child
+        spill on the next hash digit, recursively.
+        """
+        last_level = self.partitions ** (self.level + 1) >= HASH_RANGE
+        merged = self.load_partition(partition, None if last_level else self.max_entries)
+        if merged is not None:
+            if merged:
+                yield merged
+            return
+
+        child = CustomerSpill(self.max_entries, partitions=self.partitions, level=self.level + 1)
+        child.directory = tempfile.mkdtemp(prefix=f"part-{partition:03d}-", dir=self.directory)
+        try:
+            for batch in self._read_batches(partition):
+                child._append(batch)
+            for child_partition in range(child.partitions):
+                yield from child.merged_groups(child_partition)
+        finally:
+            child.discard()
+
+    def _all_groups(self):
+        self.spill()
+        for partition in range(self.partitions):
+            yield from self.merged_groups(partition)
+
+    def compact(self):
+        """
+        Spills memory and rewrites each partition with every customer's
+        partials merged, one batch per merged group
+        """
+        if not self.spilled:
+            return
+        self.spill()
+        for partition in range(self.partitions):
+            temp_file = self._path(partition) + ".tmp"
+            written = False
+            with open(temp_file, "wb") as f:
+                for merged in self.merged_groups(partition):
+                    pickle.dump(list(merged.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+                    written = True
+            if written:
+                os.replace(temp_file, self._path(partition))
+            else:
+                os.remove(temp_file)
+
+    def ranked(self, n=None):
+        """
+        Customers by rounded spend, highest first, ties in first-seen order.
+        With n, only the top n of each merged group are kept, so memory
+        stays within max_entries customers plus n per group.
+
+        Returns: list of (customer, (spent, count, products))
+        """
+        def rank(item):
+            return -round(item[1][0], 2), item[1][3]
+
+        groups = self._all_groups() if self.spilled else [self.memory]
+
+        candidates = []
+        for merged in groups:
+            if n:
+                candidates.extend(heapq.nsmallest(n, merged.items(), key=rank))
+            else:
+                candidates.extend(merged.items())
+        candidates.sort(key=rank)
+        if n:
+            candidates = candidates[:n]
+        return [(customer, (spent, count, products)) for customer, (spent, count, products, _) in candidates]
+
+    def merge(self, other, row_offset=0):
+        """
+        Adds another spill's customers (whose rows come after row_offset
+        rows of this one), then deletes the other's spill files
+        """
+        if other.spilled:
+            for merged in other._all_groups():
+                for entry in merged.values():
+                    entry[3] += row_offset
+                self._append(merged.items())
+            other.discard()
+        elif self.spilled:
+            for entry in other.memory.values():
+                entry[3] += row_offset
+            self._append(other.memory.items())
+        else:
+            for customer, (spent, count, products, first) in other.memory.items():
+                entry = self.memory.get(customer)
+                if entry is None:
+                    self.memory[customer] = [spent, count, products, first + row_offset]
+                else:
+                    entry[0] += spent
+                    entry[1] += count
+                    entry[2].update(products)
+            if len(self.memory) > self.max_entries:
+                self.spill()
+
+    def discard(self):
+        """
+        Deletes the spill files
+        """
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+        self.memory = {}
+
+    def persist(self, directory):
+        """
+        Moves the (compacted) spill files to `directory`, replacing what
+        was there, so they outlive the run alongside a saved state
+        """
+        if not self.spilled or os.path.abspath(self.directory) == os.path.abspath(directory):
+            self.compact()
+            return
+        self.compact()
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(self.directory, directory)
+        self.directory = directory
+
+    def to_state(self, distinct_state):
+        """
+        Returns: JSON-serializable state; spilled customers stay in their
+        (compacted) files, which the state refers to
+        """
+        self.compact()
+        return {
+            "max_entries": self.max_entries,
+            "directory": self.directory,
+            "partitions": self.partitions,
+            "memory": {
+                customer: [spent, count, distinct_state(products), first]
+                for customer, (spent, count, products, first) in self.memory.items()
+            }
+        }
+
+    @classmethod
+    def from_state(cls, state, distinct_from_state):
+        spill = cls(state["max_entries"], state["directory"], state["partitions"])
+        spill.memory = {
+            customer: [spent, count, distinct_from_state(products), first]
+            for customer, (spent, count, products, first) in state["memory"].items()
+        }
+        return spill
@@ -0,0 +1,323 @@
+from array import array
+from collections import namedtuple
+from itertools import accumulate, islice
+from operator import attrgetter, mul
+
+
+FIELDS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region"
+]
+
+# Low-cardinality columns stored as codes into a shared value list
+ENCODED_COLUMNS = ["Date", "ProductID", "ProductName", "CustomerID", "Region"]
+
+# Rows buffered per column-wise fill when extending from an iterator
+EXTEND_CHUNK_ROWS = 65536
+
+
+class Transaction(namedtuple("Transaction", FIELDS)):
+    """
+    Compact parsed transaction record. Hot loops read fields as attributes
+    (tx.Quantity); the dictionary-style access the rest of the code uses
+    (tx["Quantity"], tx.get, **tx) also works.
+    """
+
+    __slots__ = ()
+
+    # Field name -> position, for tx["Quantity"]
+    _positions = {name: position for position, name in enumerate(FIELDS)}
+
+    def __getitem__(self, key):
+        """
+        Raises: KeyError for anything but a field name, like a dictionary
+        """
+        return tuple.__getitem__(self, self._positions[key])
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return list(zip(self._fields, self))
+
+    def get(self, key, default=None):
+        if key in self._positions:
+            return self[key]
+        return default
+
+    def copy(self):
+        return self._asdict()
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self._asdict() == other
+        return tuple.__eq__(self, other)
+
+    __hash__ = tuple.__hash__
+
+
+class EncodedColumn:
+    """
+    Dictionary-encoded string column: each distinct value is stored once
+    and rows hold a 32-bit code into the value list
+    """
+
+    __slots__ = ("values", "codes", "_lookup")
+
+    def __init__(self):
+        self.values = []
+        self.codes = array("I")
+        self._lookup = {}
+
+    def encode(self, value):
+        """
+        Returns the code for value, adding it to the dictionary if new
+        """
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def extend(self, values):
+        """
+        Appends a list of values: new values are added to the dictionary
+        in first-seen order, then every code is looked up in one pass
+        """
+        lookup = self._lookup
+        for value in dict.fromkeys(values):
+            if value not in lookup:
+                lookup[value] = len(self.values)
+                self.values.append(value)
+        self.codes.extend(map(lookup.__getitem__, values))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def distinct(self):
+        """
+        Returns: the values this column's rows use, in dictionary order.
+        A take() slice shares its parent's dictionary, so `values` may
+        hold more.
+        """
+        values = self.values
+        return [values[code] for code in sorted(set(self.codes))]
+
+    def take(self, indices):
+        """
+        Returns a column of the given rows that shares this column's
+        dictionary; only the codes are copied
+        """
+        column = EncodedColumn()
+        column.values = self.values
+        column._lookup = self._lookup
+        column.codes = array("I", map(self.codes.__getitem__, indices))
+        return column
+
+
+class PackedColumn:
+    """
+    High-cardinality string column packed into one UTF-8 buffer with offsets
+    (any bytes-like buffer, so a memory-mapped file works too)
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+
+    def append(self, value):
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def extend(self, values):
+        """
+        Appends an iterable of strings with one buffer write
+        """
+        encoded = list(map(str.encode, values))
+        ends = accumulate(map(len, encoded), initial=len(self.data))
+        self.data += b"".join(encoded)
+        self.offsets.extend(islice(ends, 1, None))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        data = self.data
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield str(data[offsets[i]:offsets[i + 1]], "utf-8")
+
+    def take(self, indices):
+        """
+        Returns a column of the given rows, copying their encoded bytes
+        """
+        column = PackedColumn()
+        data = self.data
+        offsets = self.offsets
+        packed = column.data
+        append = column.offsets.append
+        for i in indices:
+            packed += data[offsets[i]:offsets[i + 1]]
+            append(len(packed))
+        return column
+
+
+_get_transaction_id = attrgetter("TransactionID")
+_get_quantity = attrgetter("Quantity")
+_get_unit_price = attrgetter("UnitPrice")
+_getters = {name: attrgetter(name) for name in ENCODED_COLUMNS}
+
+
+class TransactionTable:
+    """
+    Columnar, array-backed store of parsed transactions.
+    Quantity and UnitPrice are typed arrays, Revenue (Quantity * UnitPrice)
+    is precomputed, and string columns are dictionary-encoded.
+
+    Indexing and iterating yield Transaction records, so the table can be
+    passed to any function that expects a list of transactions.
+    """
+
+    def __init__(self):
+        self.transaction_ids = PackedColumn()
+        self.quantity = array("q")
+        self.unit_price = array("d")
+        self.revenue = array("d")
+        self.encoded = {name: EncodedColumn() for name in ENCODED_COLUMNS}
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        Builds a table from an iterable of Transaction records, e.g. straight
+        from the parser's row iterator
+        """
+        table = cls()
+        table.extend(transactions)
+        return table
+
+    def append(self, tx):
+        """
+        Appends one Transaction record
+        """
+        quantity = tx.Quantity
+        unit_price = tx.UnitPrice
+        encoded = self.encoded
+
+        self.transaction_ids.append(tx.TransactionID)
+        self.quantity.append(quantity)
+        self.unit_price.append(unit_price)
+        self.revenue.append(quantity * unit_price)
+        encoded["Date"].append(tx.Date)
+        encoded["ProductID"].append(tx.ProductID)
+        encoded["ProductName"].append(tx.ProductName)
+        encoded["CustomerID"].append(tx.CustomerID)
+        encoded["Region"].append(tx.Region)
+
+    def extend(self, transactions):
+        """
+        Appends every transaction from an iterable of Transaction records
+        or another TransactionTable. Records are filled in column by column,
+        a chunk at a time when they come from an iterator.
+        """
+        if isinstance(transactions, list):
+            self._extend_rows(transactions)
+            return
+        if not isinstance(transactions, TransactionTable):
+            rows = iter(transactions)
+            while True:
+                chunk = list(islice(rows, EXTEND_CHUNK_ROWS))
+                if not chunk:
+                    return
+                self._extend_rows(chunk)
+
+        other = transactions
+        for value in other.transaction_ids:
+            self.transaction_ids.append(value)
+        self.quantity.extend(other.quantity)
+        self.unit_price.extend(other.unit_price)
+        self.revenue.extend(other.revenue)
+        for name, column in self.encoded.items():
+            source = other.encoded[name]
+            # Re-map the other table's codes into this table's dictionary
+            remap = [column.encode(value) for value in source.values]
+            column.codes.extend(remap[code] for code in source.codes)
+
+    def _extend_rows(self, rows):
+        quantities = list(map(_get_quantity, rows))
+        unit_prices = list(map(_get_unit_price, rows))
+
+        self.transaction_ids.extend(map(_get_transaction_id, rows))
+        self.quantity.extend(quantities)
+        self.unit_price.extend(unit_prices)
+        self.revenue.extend(map(mul, quantities, unit_prices))
+        for name, column in self.encoded.items():
+            column.extend(list(map(_getters[name], rows)))
+
+    def take(self, indices):
+        """
+        Returns a new table holding only the given row indices, in order.
+        String dictionaries are shared with this table, so rows added to
+        either may add values the other does not use.
+        """
+        indices = list(indices)
+        table = TransactionTable()
+        table.transaction_ids = self.transaction_ids.take(indices)
+        table.quantity = array("q", map(self.quantity.__getitem__, indices))
+        table.unit_price = array("d", map(self.unit_price.__getitem__, indices))
+        table.revenue = array("d", map(self.revenue.__getitem__, indices))
+        table.encoded = {name: column.take(indices) for name, column in self.encoded.items()}
+        return table
+
+    def column(self, name):
+        """
+        Returns an iterable over one column's values
+        """
+        if name == "TransactionID":
+            return self.transaction_ids
+        if name == "Quantity":
+            return self.quantity
+        if name == "UnitPrice":
+            return self.unit_price
+        if name == "Revenue":
+            return self.revenue
+        return self.encoded[name]
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __getitem__(self, index):
+        encoded = self.encoded
+        return tuple.__new__(Transaction, (
+            self.transaction_ids[index], encoded["Date"][index],
+            encoded["ProductID"][index], encoded["ProductName"][index],
+            self.quantity[index], self.unit_price[index],
+            encoded["CustomerID"][index], encoded["Region"][index]
+        ))
+
+    def __iter__(self):
+        encoded = self.encoded
+        columns = zip(
+            self.transaction_ids, encoded["Date"], encoded["ProductID"],
+            encoded["ProductName"], self.quantity, self.unit_price,
+            encoded["CustomerID"], encoded["Region"]
+        )
+        new_record = tuple.__new__
+        for row in columns:
+            yield new_record(Transaction, row)